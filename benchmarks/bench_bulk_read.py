@@ -0,0 +1,77 @@
+"""
+Read time of an FSECReadableDevice with eight hinted uncached Tango attributes.
+
+The device is served by a Tango test device server (MultiDeviceTestContext) in a
+separate process. FSECReadableDevice.read reads all attributes with one
+read_attributes call, StandardReadable.read reads them one by one.
+
+    python benchmarks/bench_bulk_read.py
+"""
+
+import asyncio
+import time
+from typing import Annotated as A
+
+from ophyd_async.core import SignalR, StandardReadable, StandardReadableFormat as Format
+from tango.server import Device, attribute
+from tango.test_context import MultiDeviceTestContext
+
+from desy_bluesky.devices.fsec_readable_device import FSECReadableDevice
+
+READS = 200
+
+
+class FakeCounter(Device):
+    def _counts(self):
+        return 1.0
+
+    Counts1 = attribute(dtype=float, fget=_counts)
+    Counts2 = attribute(dtype=float, fget=_counts)
+    Counts3 = attribute(dtype=float, fget=_counts)
+    Counts4 = attribute(dtype=float, fget=_counts)
+    Counts5 = attribute(dtype=float, fget=_counts)
+    Counts6 = attribute(dtype=float, fget=_counts)
+    Counts7 = attribute(dtype=float, fget=_counts)
+    Counts8 = attribute(dtype=float, fget=_counts)
+
+
+class Counter(FSECReadableDevice):
+    Counts1: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts2: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts3: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts4: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts5: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts6: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts7: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+    Counts8: A[SignalR[float], Format.HINTED_UNCACHED_SIGNAL]
+
+
+async def time_reads(read) -> float:
+    await read()
+    start = time.perf_counter()
+    for _ in range(READS):
+        await read()
+    return (time.perf_counter() - start) / READS
+
+
+async def main(trl: str) -> None:
+    counter = Counter(trl, name="counter", auto_fill_signals=False)
+    await counter.connect()
+    bulk = await counter.read()
+    single = await StandardReadable.read(counter)
+    assert {key: r["value"] for key, r in bulk.items()} == {
+        key: r["value"] for key, r in single.items()
+    }
+
+    print(f"Reading 8 uncached attributes, mean of {READS} reads")
+    for label, read in (
+        ("one by one", lambda: StandardReadable.read(counter)),
+        ("read_attributes", counter.read),
+    ):
+        print(f"  {label:<16} {await time_reads(read) * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    devices = [{"class": FakeCounter, "devices": [{"name": "test/counter/1"}]}]
+    with MultiDeviceTestContext(devices, process=True) as context:
+        asyncio.run(main(context.get_device_access("test/counter/1")))
@@ -0,0 +1,73 @@
+"""
+Startup time of create_devices against the length of a dependency chain.
+
+Every mock device takes 50 ms to connect. The devices of a chain are created one
+after another, the free devices at the same time, so the startup takes about
+chain length x 50 ms however many free devices there are.
+
+    python benchmarks/bench_device_startup.py
+"""
+
+import asyncio
+import contextlib
+import io
+import time
+
+from ophyd_async.core import Device
+
+from desy_bluesky.devices.device_init import create_devices
+from desy_bluesky.devices.startup_profile import StartupProfile
+
+CONNECT_TIME = 0.05
+FREE_DEVICES = 200
+
+
+class MockDevice(Device):
+    def __init__(self, name: str = "", source=None) -> None:
+        self.references = {"source": source}
+        super().__init__(name=name)
+
+    async def connect(self, *args, **kwargs) -> None:
+        await asyncio.sleep(CONNECT_TIME)
+
+
+def device_list(chain: int) -> dict:
+    devlist = {}
+    for i in range(chain):
+        kwargs = {"name": f"chain{i}"}
+        if i:
+            kwargs["source"] = f"chain{i - 1}#device"
+        devlist[f"chain{i}"] = {"driver": "MockDevice", "kwargs": kwargs}
+    for i in range(FREE_DEVICES):
+        devlist[f"free{i}"] = {"driver": "MockDevice", "kwargs": {"name": f"free{i}"}}
+    return devlist
+
+
+async def startup(chain: int) -> tuple[float, StartupProfile]:
+    profile = StartupProfile()
+    start = time.perf_counter()
+    # create_devices prints a line per device
+    with contextlib.redirect_stdout(io.StringIO()):
+        await create_devices(
+            device_list(chain),
+            {"MockDevice": MockDevice},
+            max_connections=None,
+            profile=profile,
+        )
+    return time.perf_counter() - start, profile
+
+
+def main() -> None:
+    results = []
+    for chain in (1, 5, 10, 20):
+        elapsed, profile = asyncio.run(startup(chain))
+        results.append((chain, elapsed))
+    print(profile.report(), end="\n\n")
+    print(f"{FREE_DEVICES} free devices, {CONNECT_TIME * 1e3:.0f} ms connect each")
+    print(f"{'chain':>6}  {'startup (s)':>11}  {'chain x connect (s)':>19}")
+    for chain, elapsed in results:
+        print(f"{chain:>6}  {elapsed:>11.3f}  {chain * CONNECT_TIME:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
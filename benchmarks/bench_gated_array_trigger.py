@@ -0,0 +1,118 @@
+"""
+Dead time per point of a GatedArray trigger with 32 counters.
+
+A DGG2 timer and 32 SIS3820 counters are served by a Tango test device server
+(MultiDeviceTestContext) in a separate process. Reading SampleTime and Reset takes
+2 ms on the server, a 10 ms gate takes 12 ms. The trigger, which resets the counters
+concurrently while the gate is armed, is compared with resetting the counters first
+and then triggering the gate. The dead time is the trigger time minus the gate time.
+
+    python benchmarks/bench_gated_array_trigger.py
+"""
+
+import asyncio
+import time
+
+from tango import DevState
+from tango.server import Device, attribute
+from tango.test_context import MultiDeviceTestContext
+
+from desy_bluesky.devices.gated_array import GatedArray
+
+COUNTERS = 32
+LATENCY = 0.002
+SAMPLE_TIME = 0.01
+TRIGGERS = 50
+
+
+class FakeDGG2(Device):
+    def init_device(self):
+        super().init_device()
+        self.set_state(DevState.ON)
+
+    @attribute(dtype=float)
+    def SampleTime(self):
+        time.sleep(LATENCY)
+        return SAMPLE_TIME
+
+    @SampleTime.setter
+    def SampleTime(self, value):
+        pass
+
+    @attribute(dtype=int)
+    def Stop(self):
+        return 0
+
+    @attribute(dtype=int)
+    def StartAndWaitForTimer(self):
+        time.sleep(SAMPLE_TIME + LATENCY)
+        return 0
+
+
+class FakeSIS3820(Device):
+    def init_device(self):
+        super().init_device()
+        self.set_state(DevState.ON)
+
+    @attribute(dtype=float)
+    def Counts(self):
+        return 1.0
+
+    @Counts.setter
+    def Counts(self, value):
+        pass
+
+    @attribute(dtype=float)
+    def Offset(self):
+        return 0.0
+
+    @Offset.setter
+    def Offset(self, value):
+        pass
+
+    @attribute(dtype=int)
+    def Reset(self):
+        time.sleep(LATENCY)
+        return 0
+
+
+async def reset_then_trigger(array: GatedArray) -> None:
+    await asyncio.gather(
+        *(counter.Reset.get_value() for counter in array.counters.values())
+    )
+    await array.gate.trigger()
+
+
+async def dead_time(trigger) -> float:
+    await trigger()
+    start = time.perf_counter()
+    for _ in range(TRIGGERS):
+        await trigger()
+    return (time.perf_counter() - start) / TRIGGERS - SAMPLE_TIME
+
+
+async def main(context: MultiDeviceTestContext) -> None:
+    array = GatedArray(
+        context.get_device_access("test/dgg2/1"),
+        [context.get_device_access(f"test/sis3820/{i}") for i in range(COUNTERS)],
+        name="array",
+    )
+    await array.connect()
+    print(f"GatedArray with {COUNTERS} counters, {SAMPLE_TIME * 1e3:g} ms gate")
+    for label, trigger in (
+        ("reset, then gate", lambda: reset_then_trigger(array)),
+        ("trigger", array.trigger),
+    ):
+        print(f"  {label:<17} dead time {await dead_time(trigger) * 1e3:5.1f} ms/point")
+
+
+if __name__ == "__main__":
+    devices = [
+        {"class": FakeDGG2, "devices": [{"name": "test/dgg2/1"}]},
+        {
+            "class": FakeSIS3820,
+            "devices": [{"name": f"test/sis3820/{i}"} for i in range(COUNTERS)],
+        },
+    ]
+    with MultiDeviceTestContext(devices, process=True) as context:
+        asyncio.run(main(context))
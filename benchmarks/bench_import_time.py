@@ -0,0 +1,67 @@
+"""
+Import time of the desy_bluesky packages and cost of resolving a device driver.
+
+Each import is timed in a fresh interpreter, so nothing is cached in sys.modules.
+The driver resolution is timed for the first and the repeated lookup of the same
+driver string, which _get_device_type caches.
+
+    python benchmarks/bench_import_time.py
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+from desy_bluesky.devices.device_init import _get_device_type
+
+REPEAT = 5
+
+IMPORTS = [
+    "import desy_bluesky.devices",
+    "import desy_bluesky.scripts",
+    "from desy_bluesky.devices import create_devices",
+    "from desy_bluesky.devices import OmsVME58MotorEncoder",
+]
+
+TIMER = (
+    "import time; start = time.perf_counter(); {}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def import_time(statement: str) -> float:
+    times = []
+    for _ in range(REPEAT):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        times.append(float(output.split()[-1]))
+    return statistics.median(times)
+
+
+def driver_lookup_time(driver: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _get_device_type(driver)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    print(f"Import time in a fresh interpreter, median of {REPEAT}")
+    for statement in IMPORTS:
+        print(f"  {statement:<56} {import_time(statement) * 1e3:8.1f} ms")
+
+    driver = "desy_bluesky.devices.SIS3820Counter"
+    first = driver_lookup_time(driver, 1)
+    cached = driver_lookup_time(driver, 10000)
+    print(f"Resolving the driver {driver}")
+    print(f"  first lookup  {first * 1e3:8.1f} ms")
+    print(f"  cached lookup {cached * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
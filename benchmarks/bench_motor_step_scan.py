@@ -0,0 +1,142 @@
+"""
+Step scan of an OmsVME58MotorEncoder against a simulated motor.
+
+The motor is served by a Tango test device server (MultiDeviceTestContext) in a
+separate process. It moves at SlewRate / Conversion units per second and counts the
+reads of Conversion, SlewRate and Acceleration. The scan is run with the motion
+parameter snapshot kept for motion_config_max_age = 60 s (the default) and with
+max_age 0, which reads the parameters before every move.
+
+    python benchmarks/bench_motor_step_scan.py
+"""
+
+import time
+
+import numpy as np
+import bluesky.plans as bp
+from bluesky import RunEngine
+from bluesky.run_engine import call_in_bluesky_event_loop
+from tango import AttrWriteType, DevState, DeviceProxy
+from tango.server import Device, attribute
+from tango.test_context import MultiDeviceTestContext
+
+from desy_bluesky.devices.omsvme58 import OmsVME58MotorEncoder
+
+POINTS = 500
+REPEAT = 3
+
+
+class FakeMotor(Device):
+    def init_device(self):
+        super().init_device()
+        self.start = self.target = 0.0
+        self.start_time = 0.0
+        self.slew_rate = 1000
+        self.conversion = 100.0
+        self.acceleration = 10000
+        self.config_reads = 0
+
+    def _position(self) -> tuple[float, bool]:
+        velocity = self.slew_rate / self.conversion
+        distance = self.target - self.start
+        elapsed = time.time() - self.start_time
+        if elapsed >= abs(distance) / velocity:
+            return self.target, False
+        return self.start + np.sign(distance) * velocity * elapsed, True
+
+    def dev_state(self):
+        return DevState.MOVING if self._position()[1] else DevState.ON
+
+    @attribute(dtype=float, access=AttrWriteType.READ_WRITE)
+    def Position(self):
+        return self._position()[0]
+
+    @Position.setter
+    def Position(self, value):
+        self.start = self._position()[0]
+        self.target = value
+        self.start_time = time.time()
+
+    @attribute(dtype=float)
+    def PositionEncoder(self):
+        return self._position()[0]
+
+    @attribute(dtype=float)
+    def PositionEncoderRaw(self):
+        return self._position()[0] * self.conversion
+
+    @attribute(dtype=int, access=AttrWriteType.READ_WRITE)
+    def SlewRate(self):
+        self.config_reads += 1
+        return self.slew_rate
+
+    @SlewRate.setter
+    def SlewRate(self, value):
+        self.slew_rate = value
+
+    @attribute(dtype=int, access=AttrWriteType.READ_WRITE)
+    def SlewRateMax(self):
+        return 100000
+
+    @SlewRateMax.setter
+    def SlewRateMax(self, value):
+        pass
+
+    @attribute(dtype=float, access=AttrWriteType.READ_WRITE)
+    def Conversion(self):
+        self.config_reads += 1
+        return self.conversion
+
+    @Conversion.setter
+    def Conversion(self, value):
+        pass
+
+    @attribute(dtype=int, access=AttrWriteType.READ_WRITE)
+    def Acceleration(self):
+        self.config_reads += 1
+        return self.acceleration
+
+    @Acceleration.setter
+    def Acceleration(self, value):
+        pass
+
+    @attribute(dtype=int)
+    def StopMove(self):
+        self.start = self.target = self._position()[0]
+        return 0
+
+    @attribute(dtype=int)
+    def ConfigReads(self):
+        return self.config_reads
+
+
+def main(trl: str) -> None:
+    RE = RunEngine()
+    motor = OmsVME58MotorEncoder(trl, name="motor")
+    call_in_bluesky_event_loop(motor.connect())
+    server = DeviceProxy(trl)
+    RE(bp.scan([], motor, 0, 0.05, 10))
+    times = {0: [], 60: []}
+    reads = {}
+    # Alternate the settings, so that both see the same drift of the machine
+    for _ in range(REPEAT):
+        for max_age in times:
+            motor.motion_config_max_age = max_age
+            reads_before = server.ConfigReads
+            start = time.perf_counter()
+            RE(bp.scan([], motor, 0, 0.05, POINTS))
+            times[max_age].append((time.perf_counter() - start) / POINTS)
+            reads[max_age] = server.ConfigReads - reads_before
+    print(f"Step scan of {POINTS} points, best of {REPEAT}")
+    for max_age in times:
+        print(
+            f"  motion_config_max_age {max_age:>2} s:"
+            f" {min(times[max_age]) * 1e3:5.2f} ms/point,"
+            f" {reads[max_age]} motion parameter reads"
+        )
+
+
+if __name__ == "__main__":
+    devices = [{"class": FakeMotor, "devices": [{"name": "test/motor/1"}]}]
+    with MultiDeviceTestContext(devices, process=True) as context:
+        main(context.get_device_access("test/motor/1"))
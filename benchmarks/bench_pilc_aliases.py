@@ -0,0 +1,104 @@
+"""
+Attribute access, alias access and read() time of a PiLC with 16 ports.
+
+The PiLC is a mock device: its Tango proxy only answers the attribute list of a
+PiLC with ADC, DAC and IO ports, and its signals are soft signals. The alias lookup
+with __getattr__ is compared with the previous __getattribute__, which ran every
+attribute access through a try/except.
+
+    python benchmarks/bench_pilc_aliases.py
+"""
+
+import asyncio
+import timeit
+
+from ophyd_async.core import (
+    DeviceVector,
+    StandardReadable,
+    StandardReadableFormat as Format,
+    soft_signal_rw,
+)
+
+from desy_bluesky.devices import pilc as pilc_module
+from desy_bluesky.devices.pilc import IO_PROPERTIES, PiLC
+
+ACCESSES = 200000
+READS = 500
+
+
+def soft_signal(datatype, trl, device_proxy=None):
+    return soft_signal_rw(datatype, name=trl.strip("/"))
+
+
+# The signals of the mock PiLC do not connect to Tango
+pilc_module.tango_signal_rw = pilc_module.tango_signal_r = soft_signal
+
+
+class FakeProxy:
+    def get_attribute_list(self):
+        attributes = [f"Clk_{i}" for i in range(1, 5)]
+        for num in range(1, 13):
+            attributes += [f"IO_{prop}_{num}" for prop in IO_PROPERTIES]
+            attributes += [f"IO_Resistor_{num}", f"Name_{num}"]
+        attributes += ["ADC_13", "ADC_14", "DAC_15", "DAC_16"]
+        return attributes
+
+
+class MockPiLC(PiLC):
+    def __init__(self, aliases: dict) -> None:
+        self.trl = "tango://host:10000/test/pilc/1"
+        self.ports = DeviceVector({})
+        self.port_config = None
+        self.readable_module_types = ["ADC"]
+        self.movable_module_types = ["DAC"]
+        self.aliases = aliases
+        self.port_map = None
+        self.proxy = FakeProxy()
+        StandardReadable.__init__(self, name="pilc")
+        self.register_signals()
+
+    def set_readable_signals(self, read: list, config: list) -> None:
+        self.add_readables(read, Format.UNCACHED_SIGNAL)
+        self.add_readables(config, Format.CONFIG_SIGNAL)
+
+
+class PreviousMockPiLC(MockPiLC):
+    def __getattribute__(self, name: str):
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            return self.__getitem__(name)
+
+
+def access_time(statement) -> float:
+    return min(timeit.repeat(statement, number=ACCESSES, repeat=5)) / ACCESSES
+
+
+async def read_time(pilc: PiLC) -> float:
+    await pilc.read()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(READS):
+        await pilc.read()
+    return (loop.time() - start) / READS
+
+
+async def main() -> None:
+    aliases = {"trigger": 3, "adc": 13}
+    print(f"PiLC with 16 ports, aliases {aliases}")
+    print(f"{'':<22}{'ports':>10}{'alias':>10}{'read()':>10}")
+    for label, cls in (("__getattribute__", PreviousMockPiLC), ("__getattr__", MockPiLC)):
+        pilc = cls(aliases)
+        # Only the signals are connected, the PiLC port classes are no Devices
+        await asyncio.gather(
+            *(signal.connect() for signal in pilc._readable + pilc._movable)
+        )
+        assert pilc.trigger is pilc.ports[3]
+        ports = access_time(lambda: pilc.ports) * 1e9
+        alias = access_time(lambda: pilc.trigger) * 1e9
+        read = await read_time(pilc) * 1e6
+        print(f"  {label:<20}{ports:>7.0f} ns{alias:>7.0f} ns{read:>7.0f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Time to resolve the kwargs of a synthetic list of 1000 devices.
+
+The kwargs of every device hold a metadata dict, a few plain values and, for every
+fourth device, '#device' references in a plain kwarg, a list and a dict, like a
+device list read from YAML. _resolve_kwargs is compared with the previous
+resolution, which deep-copied the kwargs and ran one task per kwarg and per list
+element.
+
+    python benchmarks/bench_resolve_kwargs.py
+"""
+
+import asyncio
+import copy
+import time
+
+from ophyd_async.core import Device
+
+from desy_bluesky.devices.device_init import _get_sub_device, _resolve_kwargs
+
+DEVICES = 1000
+REPEAT = 5
+
+
+def device_kwargs(i: int) -> dict:
+    kwargs = {
+        "name": f"dev{i}",
+        "md": {"beamline": "p09", "position": [i, 0.0, 1.5], "labels": ["detector"]},
+        "trigger_mode": "auto",
+        "sample_time": 0.1,
+        "channels": [1, 2, 3, 4],
+    }
+    if i % 4 == 0:
+        kwargs["gate"] = "timer#device"
+        kwargs["counters"] = [f"counter{j}#device" for j in range(4)]
+        kwargs["sources"] = {"x": "motor_x#device", "y": "motor_y#device"}
+    return kwargs
+
+
+async def previous_resolve(kwargs: dict, namespace: dict) -> dict:
+    """The resolution before _resolve_kwargs"""
+
+    async def parse_arg(parent, arg):
+        if isinstance(arg, str) and "#device" in arg:
+            return await _get_sub_device(parent, arg.split("#")[0], namespace)
+        return arg
+
+    async def parse_kwarg(parent, key, value):
+        if key in ["driver", "uri", "name", "md"]:
+            return value
+        if isinstance(value, dict):
+            values = await asyncio.gather(
+                *(parse_arg(copy.deepcopy(parent), val) for val in value.values())
+            )
+            return dict(zip(value.keys(), values))
+        if isinstance(value, (list, set, tuple)):
+            return await asyncio.gather(
+                *(
+                    asyncio.create_task(parse_arg(copy.deepcopy(parent), val))
+                    for val in value
+                )
+            )
+        return await parse_arg(parent, value)
+
+    kwargs_c = copy.deepcopy(kwargs)
+    parent = kwargs_c["name"]
+    tasks = [
+        asyncio.create_task(parse_kwarg(copy.deepcopy(parent), key, value))
+        for key, value in kwargs_c.items()
+    ]
+    for key, value in zip(kwargs_c.keys(), await asyncio.gather(*tasks)):
+        kwargs_c[key] = value
+    return kwargs_c
+
+
+async def run(resolve, devlist: list, namespace: dict) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(resolve(kwargs["name"], kwargs, namespace) for kwargs in devlist))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    names = ["timer", "motor_x", "motor_y"] + [f"counter{j}" for j in range(4)]
+    namespace = {name: Device(name=name) for name in names}
+    devlist = [device_kwargs(i) for i in range(DEVICES)]
+
+    async def previous(parent, kwargs, namespace):
+        return await previous_resolve(kwargs, namespace)
+
+    resolved = await _resolve_kwargs("dev0", devlist[0], namespace)
+    assert resolved == await previous_resolve(devlist[0], namespace)
+
+    print(f"Resolving the kwargs of {DEVICES} devices, best of {REPEAT}")
+    for label, resolve in (("previous", previous), ("_resolve_kwargs", _resolve_kwargs)):
+        best = min([await run(resolve, devlist, namespace) for _ in range(REPEAT)])
+        print(f"  {label:<16} {best * 1e3:8.1f} ms  {best / DEVICES * 1e6:6.1f} us/device")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Callback latency and event loop lag of an FSECSubscribable with many signals.
+
+Every hinted soft signal of a mock device is updated at 50 Hz for 2 s. The
+benchmark counts the signal updates and the aggregated callbacks, the latency from
+an update to the callback delivering it, which is bounded by callback_window, and
+how late a 10 ms loop timer fires, which is the time the event loop was blocked.
+
+    python benchmarks/bench_subscribable_callbacks.py
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+
+from ophyd_async.core import (
+    StandardReadable,
+    StandardReadableFormat as Format,
+    soft_signal_rw,
+)
+
+from desy_bluesky.devices.fsec_readable_device import FSECSubscribable
+
+RATE = 50
+DURATION = 2.0
+TICK = 0.01
+
+
+class MockDevice(FSECSubscribable, StandardReadable):
+    def __init__(self, signals: int, name: str = "") -> None:
+        with self.add_children_as_readables(Format.HINTED_SIGNAL):
+            for i in range(signals):
+                setattr(self, f"sig{i}", soft_signal_rw(float, 0.0))
+        super().__init__(name=name)
+
+
+async def measure_loop_lag(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(signals: int) -> dict:
+    device = MockDevice(signals, name="mock")
+    await device.connect()
+    latencies = []
+    updated_at = {}
+    callbacks = 0
+
+    def callback(readings):
+        nonlocal callbacks
+        callbacks += 1
+        now = time.perf_counter()
+        latencies.extend(now - updated_at[key] for key in readings if key in updated_at)
+        updated_at.clear()
+
+    device.subscribe(callback)
+    lags = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lags, stop))
+    updates = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        for i in range(signals):
+            updated_at.setdefault(f"mock-sig{i}", time.perf_counter())
+            await getattr(device, f"sig{i}").set(updates)
+        updates += signals
+        await asyncio.sleep(1 / RATE)
+    await asyncio.sleep(2 * device.callback_window)
+    stop.set()
+    await lag_task
+    device.disconnect()
+    return {
+        "updates/s": updates / DURATION,
+        "callbacks": callbacks,
+        "mean latency (ms)": statistics.mean(latencies) * 1e3,
+        "max loop lag (ms)": max(lags) * 1e3,
+    }
+
+
+def main() -> None:
+    # ophyd-async warns on every clear_sub of a subscribe callback, although the
+    # callback is removed
+    logging.getLogger("ophyd_async").setLevel(logging.ERROR)
+    print(f"Soft signals updated at {RATE} Hz for {DURATION:g} s")
+    columns = ["updates/s", "callbacks", "mean latency (ms)", "max loop lag (ms)"]
+    print(f"{'signals':>8}" + "".join(f"  {c:>17}" for c in columns))
+    for signals in (10, 50, 200):
+        result = asyncio.run(run(signals))
+        print(f"{signals:>8}" + "".join(f"  {result[c]:>17.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,57 @@
-from .dgg2 import DGG2Timer
-from .gated_counter import GatedCounter
-from .mca8715 import MCA8715
-from .omsvme58 import (
-    OmsVME58Motor,
-    OmsVME58MotorEncoder,
-    OmsVME58MotorNoEncoder,
-    PolledOmsVME58MotorNoEncoder,
-)
-from .sis3820 import SIS3820Counter, SIS3820Subscribable
-from .undulator import Undulator
-from .vc_counter import VcCounter
-from .vm_motor import VmMotor
-from .pilc import PiLC
-from .gated_array import GatedArray
-from .fsec_readable_device import FSECReadableDevice, FSECSubscribable
-from .eurotherm3216 import Eurotherm3216
-from .device_init import create_devices, get_device_list
-from .dante import Dante
-
-__all__ = [
-    "DGG2Timer",
-    "GatedCounter",
-    "MCA8715",
-    "OmsVME58Motor",
-    "OmsVME58MotorEncoder",
-    "OmsVME58MotorNoEncoder",
-    "PolledOmsVME58MotorNoEncoder",
-    "SIS3820Counter",
-    "SIS3820Subscribable",
-    "Undulator",
-    "VcCounter",
-    "VmMotor",
-    "PiLC",
-    "GatedArray",
-    "FSECReadableDevice",
-    "FSECSubscribable",
-    "Eurotherm3216",
-    "create_devices",
-    "get_device_list",
-    "Dante"
-]
+"""
+Device classes and device creation tools.
+
+The submodules are imported on first attribute access (PEP 562), so importing the
+package does not pull in pytango, ophyd_async.tango, numpy or bluesky_queueserver until
+a device class or create_devices is actually used.
+"""
+
+import importlib
+
+_SUBMODULES = {
+    "DGG2Timer": ".dgg2",
+    "GatedCounter": ".gated_counter",
+    "MCA8715": ".mca8715",
+    "OmsVME58Motor": ".omsvme58",
+    "OmsVME58MotorEncoder": ".omsvme58",
+    "OmsVME58MotorGroup": ".omsvme58",
+    "OmsVME58MotorNoEncoder": ".omsvme58",
+    "PolledOmsVME58MotorNoEncoder": ".omsvme58",
+    "SIS3820Counter": ".sis3820",
+    "SIS3820Subscribable": ".sis3820",
+    "Undulator": ".undulator",
+    "VcCounter": ".vc_counter",
+    "VmMotor": ".vm_motor",
+    "PiLC": ".pilc",
+    "PiLCFlyer": ".pilc_flyer",
+    "GatedArray": ".gated_array",
+    "FSECReadableDevice": ".fsec_readable_device",
+    "FSECSubscribable": ".fsec_readable_device",
+    "Eurotherm3216": ".eurotherm3216",
+    "Eurotherm3216Array": ".eurotherm3216",
+    "create_devices": ".device_init",
+    "get_device_list": ".device_init",
+    "reload_devices": ".device_init",
+    "LazyDevice": ".device_init",
+    "TangoAttributeCache": ".attribute_cache",
+    "StartupProfile": ".startup_profile",
+    "SignalHistory": ".signal_history",
+    "PollingPolicy": ".polling_policy",
+    "SettleEngine": ".settle_engine",
+    "Dante": ".dante",
+}
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name: str):
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SUBMODULES[name], __name__), name)
+    # Cache the attribute so that __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,181 @@
+"""
+Opt-in on-disk cache of Tango attribute metadata.
+
+Introspecting a Tango device costs one round-trip per query: the attribute and
+command lists, and the config of every attribute and command the signals of the
+device are inferred from. The cache stores the results per TRL in a JSON file so
+that warm restarts of the queue-server worker can skip them. FSECReadableDevice
+takes its introspection from the cache while it connects, PiLC its attribute list
+and port map.
+
+Entries are keyed by the TRL only, so using the cache costs no round-trip. Checking
+the entry against the running server would cost a Tango database round-trip per
+device, as much as the introspection it saves. Instead, stale entries are dropped:
+
+- by create_devices, when a device fails to connect with a cache entry; the device is
+  then connected once more with live introspection,
+- after max_age seconds, if given,
+- explicitly with invalidate, e.g. after the attributes of a server changed without
+  the devices failing to connect.
+
+Usage:
+
+    cache = TangoAttributeCache("~/.cache/desy_bluesky/attributes.json")
+    await create_devices(devlist, namespace, attribute_cache=cache)
+
+    cache.invalidate("tango://host:10000/p09/pilc/01")  # or cache.invalidate()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from tango import DeviceProxy
+
+_ACTIVE_CACHE: TangoAttributeCache | None = None
+
+
+class TangoAttributeCache:
+    """
+    JSON file backed cache of Tango attribute lists and values derived from them.
+
+    :param path: Path of the cache file. It is created on the first save.
+    :param max_age: Age in seconds after which an entry is introspected again. None
+        keeps entries until they are invalidated.
+    """
+
+    def __init__(self, path: str, max_age: float | None = None) -> None:
+        self.path = os.path.expanduser(path)
+        self.max_age = max_age
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            print(f"Warning: Ignoring unreadable attribute cache {self.path}: {exc}")
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self) -> None:
+        """Write the cache file if any entry has changed."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def invalidate(self, trl: str | None = None) -> None:
+        """
+        Drop the cache entry of one TRL, or all entries if no TRL is given.
+        """
+        if trl is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(trl, None)
+        self._dirty = True
+
+    def __contains__(self, trl: str) -> bool:
+        return trl in self._entries
+
+    def _lookup(self, trl: str) -> Dict[str, Any]:
+        """Return the entry of a TRL, or an empty dict if it is missing or too old."""
+        entry = self._entries.get(trl)
+        if entry is None or (
+            self.max_age is not None
+            and time.time() - entry.get("time", 0.0) > self.max_age
+        ):
+            return {}
+        return entry
+
+    def _entry(self, trl: str) -> Dict[str, Any]:
+        """
+        Return the entry of a TRL to store a value in, starting a new one if it is
+        missing or too old.
+        """
+        entry = self._lookup(trl)
+        if not entry:
+            entry = {"time": time.time()}
+            self._entries[trl] = entry
+        self._dirty = True
+        return entry
+
+    def get_attribute_list(self, proxy: DeviceProxy, trl: str) -> List[str]:
+        """Return the attribute list of a device, from the cache if possible."""
+        attributes = self._lookup(trl).get("attributes")
+        if attributes is None:
+            attributes = list(proxy.get_attribute_list())
+            self._entry(trl)["attributes"] = attributes
+        return attributes
+
+    def get_introspection(self, trl: str) -> Dict[str, Any] | None:
+        """
+        Return the introspection of a device stored with set_introspection (its
+        attribute and command lists and the configs its signals are inferred from),
+        or None.
+        """
+        return self._lookup(trl).get("introspection")
+
+    def set_introspection(self, trl: str, introspection: Dict[str, Any]) -> None:
+        """Store the JSON serialisable introspection of a device."""
+        entry = self._entry(trl)
+        entry["introspection"] = introspection
+        entry["attributes"] = introspection["attributes"]
+
+    def get_value(self, trl: str, key: str) -> Any:
+        """
+        Return a value derived from the device metadata (e.g. a port map) stored with
+        set_value, or None. It is invalidated together with the attribute metadata.
+        """
+        return self._lookup(trl).get("values", {}).get(key)
+
+    def set_value(self, trl: str, key: str, value: Any) -> None:
+        """Store a JSON serialisable value derived from the device metadata."""
+        self._entry(trl).setdefault("values", {})[key] = value
+
+
+def set_attribute_cache(cache: TangoAttributeCache | None) -> None:
+    """Set the attribute cache used by devices while they connect."""
+    global _ACTIVE_CACHE
+    _ACTIVE_CACHE = cache
+
+
+def get_attribute_cache() -> TangoAttributeCache | None:
+    """Return the attribute cache used by devices while they connect, if any."""
+    return _ACTIVE_CACHE
+
+
+def get_attribute_list(proxy: DeviceProxy, trl: str) -> List[str]:
+    """
+    Return the attribute list of a device through the active attribute cache, or
+    directly from the device if no cache is active.
+    """
+    if _ACTIVE_CACHE is None:
+        return list(proxy.get_attribute_list())
+    return _ACTIVE_CACHE.get_attribute_list(proxy, trl)
+
+
+def get_cached_value(trl: str, key: str) -> Any:
+    """Return a derived value from the active attribute cache, if any."""
+    if _ACTIVE_CACHE is None:
+        return None
+    return _ACTIVE_CACHE.get_value(trl, key)
+
+
+def set_cached_value(trl: str, key: str, value: Any) -> None:
+    """Store a derived value in the active attribute cache, if any."""
+    if _ACTIVE_CACHE is not None:
+        _ACTIVE_CACHE.set_value(trl, key, value)
@@ -22,33 +22,81 @@ The device dictionary should have the following structure:
         }
     }
 
+Two kwargs are handled by create_devices if the device constructor does not take
+them: 'md' is set as the md attribute of the device, and 'polling' is passed to
+set_polling_policy of the device (see desy_bluesky.devices.polling_policy).
+
 The module provides the following functions:
 
 - create_devices: Asynchronously create devices from a device dictionary.
-
-This module uses an asyncio Lock to ensure that the creation and initialization of
-devices is thread-safe.
+- reload_devices: Apply a changed device dictionary to devices created before,
+  recreating only the devices which changed and the devices depending on them.
+
+With create_devices(..., lazy=True) the namespace only receives LazyDevice
+placeholders. A placeholder connects its device the first time it is awaited, or when
+a plan run through resolve_lazy_devices_wrapper (desy_bluesky.plans.preprocessors)
+sends a message to it.
+
+The '#device' references in the device dictionary are used to build a dependency
+graph. Every device to be created gets an asyncio Future which is resolved as soon
+as the device has been created and connected, so each device is created the instant
+all of its dependencies are available.
+
+All devices are connected through one connection pass which limits the number of
+connections in flight, in total and per Tango host, so that large device lists do not
+hit the Tango database with hundreds of simultaneous DeviceProxy creations.
 """
 
 import asyncio
+import contextlib
 import copy
+import functools
 import importlib
 import os
-from typing import Dict, TypeVar, Any
+import time
+from typing import Callable, Dict, List, Set, TypeVar, Any
 
-from ophyd_async.core import init_devices
-from desy_bluesky.scripts import parse_yml
+from bluesky.run_engine import get_bluesky_event_loop
+from ophyd_async.core import DEFAULT_TIMEOUT, Device
+from desy_bluesky.scripts.parse_yml import parse_yml
 from bluesky_queueserver import is_ipython_mode
 
-RESOURCE_LOCK = asyncio.Lock()
+from .attribute_cache import (
+    TangoAttributeCache,
+    get_attribute_cache,
+    set_attribute_cache,
+)
+from .startup_profile import (
+    StartupProfile,
+    RESOLVE_DRIVER,
+    WAIT_FOR_DEPENDENCIES,
+    CONSTRUCT,
+    WAIT_FOR_CONNECTION_SLOT,
+    CONNECT,
+)
+
+DEVICE_FUTURES: Dict[str, asyncio.Future] = {}
 DEVICES_TO_BE_CREATED = []
+# Device list entries of the live devices and the devices each one received as kwargs
+DEVICE_CONFIGS: Dict[str, Dict[str, Any]] = {}
+DEVICE_DEPENDENCIES: Dict[str, Set[str]] = {}
 DEVICE_INIT_TIMEOUT = 30
+MAX_CONNECTIONS = 32
+MAX_CONNECTIONS_PER_HOST = None
 
 T = TypeVar("T")
 
 
 async def create_devices(
-    devlist: Dict[str, Dict[str, Any]], namespace: Dict[str, T] | None = None, timeout: int = None
+    devlist: Dict[str, Dict[str, Any]],
+    namespace: Dict[str, T] | None = None,
+    timeout: int = None,
+    max_connections: int | None = MAX_CONNECTIONS,
+    max_connections_per_host: int | None = MAX_CONNECTIONS_PER_HOST,
+    connect_timeout: float = DEFAULT_TIMEOUT,
+    attribute_cache: TangoAttributeCache | str | None = None,
+    lazy: bool = False,
+    profile: StartupProfile | None = None,
 ) -> Dict[str, Any]:
     """
     Create devices asynchronously from a dictionary of device types and their URIs.
@@ -57,8 +105,21 @@ async def create_devices(
     :param namespace: Namespace to add the devices to. This is usually the global
                       namespace of the calling module or startup script.
     :param timeout: Set the global device timeout (s).
+    :param max_connections: Maximum number of devices connecting at the same time.
+                            None means no limit.
+    :param max_connections_per_host: Maximum number of devices connecting at the same
+                                     time to the same Tango host. None means no limit.
+    :param connect_timeout: Timeout (s) for connecting a single device.
+    :param attribute_cache: Cache of Tango attribute metadata, or the path of its
+                            file, used by the devices while they connect. The cache
+                            file is updated after all devices are created.
+    :param lazy: Add LazyDevice placeholders to the namespace instead of creating the
+                 devices. Each placeholder creates its device when it is first used.
+    :param profile: StartupProfile recording the phases of each device. Pass one to
+                    keep the timeline, e.g. to save it as a Chrome trace.
 
     """
+    global DEVICE_INIT_TIMEOUT
     if not devlist:
         return
     tasks = []
@@ -69,291 +130,753 @@ async def create_devices(
         )
         namespace = globals()
 
+    if profile is None:
+        profile = StartupProfile()
+    dependencies = _get_dependencies(devlist)
+    _check_device_list(devlist, dependencies, namespace, profile)
     _check_valid_device_names(devlist)
-    # _check_circular_dependencies(devlist)
+    creation_order = _get_creation_order(dependencies)
+
+    if lazy:
+        placeholders = {}
+        for device_name in creation_order:
+            placeholders[device_name] = LazyDevice(
+                device_name, devlist[device_name], namespace, connect_timeout
+            )
+            namespace[device_name] = placeholders[device_name]
+            DEVICES_TO_BE_CREATED.remove(device_name)
+            DEVICE_CONFIGS[device_name] = copy.deepcopy(devlist[device_name])
+            DEVICE_DEPENDENCIES[device_name] = set(dependencies[device_name])
+        print(f"{len(placeholders)} lazy devices added to the namespace.")
+        return placeholders
 
     print("DEVICES TO BE CREATED: ", DEVICES_TO_BE_CREATED)
     print("Creating devices...")
 
     if timeout is not None:
         DEVICE_INIT_TIMEOUT = timeout
-    
-    for _, device_info in devlist.items():
-        try:
-            async with RESOURCE_LOCK:
-                device_type = namespace[device_info["driver"]]
-        except KeyError:
-            device_type = _get_device_type(device_info["driver"])
-        # Get uri if key exists otherwise set to None
-        uri = device_info.get("uri", None)
-        try:
-            tasks.append(
-                asyncio.create_task(
-                    _create_device(
-                        dtype=device_type,
-                        uri=uri,
-                        namespace=namespace,
-                        **device_info["kwargs"],
+
+    loop = asyncio.get_running_loop()
+    for device_name in creation_order:
+        DEVICE_FUTURES[device_name] = loop.create_future()
+        DEVICE_DEPENDENCIES[device_name] = set()
+
+    if isinstance(attribute_cache, str):
+        attribute_cache = TangoAttributeCache(attribute_cache)
+    set_attribute_cache(attribute_cache)
+
+    limiter = _ConnectionLimiter(max_connections, max_connections_per_host)
+    try:
+        for device_name in creation_order:
+            device_info = devlist[device_name]
+            with profile.phase(device_name, RESOLVE_DRIVER):
+                try:
+                    device_type = namespace[device_info["driver"]]
+                except KeyError:
+                    device_type = _get_device_type(device_info["driver"])
+            # Get uri if key exists otherwise set to None
+            uri = device_info.get("uri", None)
+            profile.hosts[device_name] = _get_tango_host(uri)
+            try:
+                tasks.append(
+                    asyncio.create_task(
+                        _create_and_connect_device(
+                            device_type,
+                            uri,
+                            namespace,
+                            device_info["kwargs"],
+                            limiter,
+                            connect_timeout,
+                            profile,
+                        )
+                    )
+                )
+                tasks[-1].add_done_callback(
+                    lambda task, name=device_name: _device_init_callback(
+                        task, name, namespace
                     )
                 )
-            )
-            tasks[-1].add_done_callback(
-                lambda task: _device_init_callback(task, namespace)
-            )
 
-        except KeyError as exc:
-            print(f"Error: {exc}")
-            return
+            except KeyError as exc:
+                print(f"Error: {exc}")
+                return
+
+        devices = await asyncio.gather(*tasks)
+    finally:
+        for device_name in creation_order:
+            DEVICE_FUTURES.pop(device_name, None)
+        set_attribute_cache(None)
+        if attribute_cache is not None:
+            attribute_cache.save()
 
-    devices = await asyncio.gather(*tasks)
     device_dict = {dev.name: dev for dev in devices}
+    for device_name in creation_order:
+        DEVICE_CONFIGS[device_name] = copy.deepcopy(devlist[device_name])
 
-    if not DEVICES_TO_BE_CREATED:
+    # Other calls of create_devices (e.g. lazy devices) may be running concurrently,
+    # so only check the devices of this call
+    not_created = [name for name in creation_order if name in DEVICES_TO_BE_CREATED]
+    if not not_created:
         print("All startup devices created.")
     else:
         print("Error: Not all devices created.")
-        print("Devices not created: ", DEVICES_TO_BE_CREATED)
+        print("Devices not created: ", not_created)
+
+    print(profile.report(dependencies))
 
     return device_dict
 
 
-async def _create_device(
-    dtype: T, uri: str = None, namespace: Dict[str, T] = None, **kwargs
+class LazyDevice:
+    """
+    Placeholder for a device which is created and connected the first time it is
+    needed.
+
+    The device object is constructed (without connecting it) on the first attribute
+    access, so that plans can inspect it. It is connected when the placeholder (or
+    its connect method) is awaited, or when a plan run through
+    resolve_lazy_devices_wrapper sends a message to it or to one of its children.
+    Once connected, the device replaces the placeholder in the namespace.
+    """
+
+    # Marker for resolve_lazy_devices_wrapper, which does not import this module
+    _lazy_device = True
+
+    def __init__(
+        self,
+        name: str,
+        device_info: Dict[str, Any],
+        namespace: Dict[str, T],
+        connect_timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self._device_info = device_info
+        self._namespace = namespace
+        self._connect_timeout = connect_timeout
+        self._device = None
+        self._task: asyncio.Task | None = None
+        self.resolved = False
+        self.connect_time: float | None = None
+
+    def _construct(self) -> Any:
+        """Construct the device, and the lazy devices it depends on, once."""
+        if self._device is None:
+            driver = self._device_info["driver"]
+            dtype = self._namespace.get(driver) or _get_device_type(driver)
+            kwargs = _substitute_references(
+                self._device_info["kwargs"],
+                lambda device_name: _get_lazy_sub_device(device_name, self._namespace),
+            )
+            self._device = _construct_device(
+                dtype, self._device_info.get("uri", None), kwargs
+            )
+            # Children taken from the placeholder (e.g. lazy.Position) lead back to
+            # it, so that resolve_lazy_devices_wrapper can connect the device
+            self._device._lazy_placeholder = self
+        return self._device
+
+    async def connect(self) -> Any:
+        """Connect the device, once, and return it."""
+        if self.resolved:
+            return self._device
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._connect())
+        try:
+            return await asyncio.shield(self._task)
+        except Exception:
+            # Allow the next attempt to retry
+            self._task = None
+            raise
+
+    async def _connect(self) -> Any:
+        start = time.perf_counter()
+        device = self._construct()
+        await asyncio.gather(
+            *(
+                self._namespace[dependency].connect()
+                for dependency in DEVICE_DEPENDENCIES.get(self.name, ())
+                if isinstance(self._namespace.get(dependency), LazyDevice)
+            )
+        )
+        if isinstance(device, Device):
+            await _connect_device(device, self._connect_timeout)
+        self._namespace[self.name] = device
+        self.resolved = True
+        self.connect_time = time.perf_counter() - start
+        print(f"Lazy device {self.name} connected in {self.connect_time:.3f} s.")
+        return device
+
+    async def disconnect(self) -> None:
+        """
+        Disconnect the device if it was constructed. A device which was never used is
+        not constructed just to disconnect it, since the devices it depends on may
+        already be gone.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        if self._device is not None:
+            await _disconnect_device(self._device)
+
+    def __await__(self):
+        return self.connect().__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or "_device_info" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._construct(), name)
+
+    def __repr__(self):
+        return self.name
+
+
+def _get_lazy_sub_device(device_name: str, namespace: Dict[str, T]) -> Any:
+    """
+    Get a device for the kwargs of a lazy device. Lazy dependencies are constructed,
+    not connected.
+    """
+    if device_name not in namespace:
+        raise KeyError(f" {device_name} not found in namespace.")
+    device = namespace[device_name]
+    if isinstance(device, LazyDevice):
+        device = device._construct()
+    return device
+
+
+async def reload_devices(
+    devlist: Dict[str, Dict[str, Any]], namespace: Dict[str, T], **kwargs
+) -> Dict[str, Any]:
+    """
+    Apply a changed device dictionary to the devices created by create_devices.
+
+    The new device list is compared with the entries the live devices were created
+    from. Devices which are no longer in the list are removed from the namespace,
+    changed devices are replaced and new devices are created. Devices which received
+    a removed or replaced device as a kwarg are recreated as well, so that they do not
+    keep a reference to the old device. All other devices are left untouched.
+
+    :param devlist: The complete new dictionary of device types and their URIs
+    :param namespace: Namespace the devices were created in
+    :param kwargs: Passed on to create_devices
+    :return: Dictionary of the created and replaced devices
+    """
+    removed = {name for name in DEVICE_CONFIGS if name not in devlist}
+    changed = {
+        name
+        for name, device_info in devlist.items()
+        if name in DEVICE_CONFIGS and device_info != DEVICE_CONFIGS[name]
+    }
+    added = {name for name in devlist if name not in DEVICE_CONFIGS}
+
+    # Collect every device which depends, directly or through other devices, on a
+    # removed or changed device
+    dependents = {}
+    for device, device_dependencies in DEVICE_DEPENDENCIES.items():
+        for dependency in device_dependencies:
+            dependents.setdefault(dependency, set()).add(device)
+    stale = set()
+    queue = list(removed | changed)
+    while queue:
+        device = queue.pop()
+        if device in stale:
+            continue
+        stale.add(device)
+        queue.extend(dependents.get(device, ()))
+
+    to_create = {name for name in stale | added if name in devlist}
+    sub_devlist = {name: devlist[name] for name in devlist if name in to_create}
+
+    # Validate before anything is torn down, against the namespace as it will be
+    remaining = {key: value for key, value in namespace.items() if key not in stale}
+    _check_device_list(sub_devlist, _get_dependencies(sub_devlist), remaining)
+
+    print(
+        f"Reloading devices: {len(added)} added, {len(changed)} changed, "
+        f"{len(removed)} removed, {len(stale - removed - changed)} dependent."
+    )
+    for name in sorted(stale):
+        device = namespace.pop(name, None)
+        DEVICE_CONFIGS.pop(name, None)
+        DEVICE_DEPENDENCIES.pop(name, None)
+        if device is not None:
+            await _disconnect_device(device)
+            print(f"Device {name} removed.")
+
+    if not sub_devlist:
+        return {}
+    return await create_devices(sub_devlist, namespace, **kwargs)
+
+
+async def _disconnect_device(device: Any) -> None:
+    """
+    Release the resources of a device which is removed from the namespace, if the
+    device provides a disconnect method. LazyDevice placeholders only disconnect
+    the device they constructed.
+    """
+    disconnect = getattr(device, "disconnect", None)
+    if callable(disconnect):
+        result = disconnect()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+class _ConnectionLimiter:
+    """
+    Limit the number of device connections in flight, in total and per Tango host.
+    """
+
+    def __init__(
+        self, max_connections: int | None, max_connections_per_host: int | None
+    ) -> None:
+        self._total = asyncio.Semaphore(max_connections) if max_connections else None
+        self._max_per_host = max_connections_per_host
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, uri: str | None):
+        async with contextlib.AsyncExitStack() as stack:
+            host = _get_tango_host(uri)
+            if self._max_per_host and host is not None:
+                if host not in self._hosts:
+                    self._hosts[host] = asyncio.Semaphore(self._max_per_host)
+                await stack.enter_async_context(self._hosts[host])
+            if self._total is not None:
+                await stack.enter_async_context(self._total)
+            yield
+
+
+def _get_tango_host(uri: str | None) -> str | None:
+    """
+    Return the Tango host of a TRL, or None if the uri is not a TRL.
+
+    'tango://host:port/domain/family/member' and 'host:port/domain/family/member'
+    return 'host:port', 'domain/family/member' returns the TANGO_HOST environment
+    variable.
+    """
+    if not isinstance(uri, str):
+        return None
+    parts = uri.split("://", 1)[-1].split("#", 1)[0].split("/")
+    if len(parts) >= 4 and ":" in parts[0]:
+        return parts[0]
+    if len(parts) == 3:
+        return os.environ.get("TANGO_HOST", "")
+    return None
+
+
+async def _create_and_connect_device(
+    dtype: T,
+    uri: str | None,
+    namespace: Dict[str, T],
+    kwargs: Dict[str, Any],
+    limiter: _ConnectionLimiter,
+    connect_timeout: float,
+    profile: StartupProfile,
 ) -> T:
     """
-    Asynchronous method to create a device.
+    Create a device as soon as its dependencies are available and connect it once
+    the limiter grants a connection slot.
+    """
+    name = kwargs["name"]
+    with profile.phase(name, WAIT_FOR_DEPENDENCIES):
+        resolved_kwargs = await _resolve_kwargs(name, kwargs, namespace)
+    with profile.phase(name, CONSTRUCT):
+        dev = _construct_device(dtype, uri, resolved_kwargs)
+    if isinstance(dev, Device):
+        queued = profile.now()
+        async with limiter.slot(uri):
+            profile.record(name, WAIT_FOR_CONNECTION_SLOT, queued, profile.now())
+            with profile.phase(name, CONNECT):
+                try:
+                    await _connect_device(dev, connect_timeout)
+                except Exception as exc:
+                    # The cached attribute metadata may be stale, so drop it and
+                    # introspect the device live. The signals of the failed device
+                    # are already filled, so a new device is connected.
+                    cache = get_attribute_cache()
+                    if cache is None or uri not in cache:
+                        raise
+                    print(
+                        f"Warning: {name} failed to connect with cached attribute"
+                        f" metadata ({exc}), retrying without it."
+                    )
+                    cache.invalidate(uri)
+                    dev = _construct_device(dtype, uri, resolved_kwargs)
+                    await _connect_device(dev, connect_timeout)
+    return dev
+
 
-    :param dtype: Device type
-    :param uri: Device URI. Can be a tango TRL or an EPICS prefix
+async def _connect_device(dev: Device, timeout: float) -> None:
     """
-    if not namespace:
-        namespace = globals()
-    kwargs_c = copy.deepcopy(kwargs)
-    if "name" not in kwargs_c:
-        raise KeyError("All devices must have a 'name' kwarg.")
+    Connect a device. In IPython mode devices must be connected in the bluesky event
+    loop, which runs in a different thread than the one creating the devices.
+    """
+    loop = get_bluesky_event_loop() if is_ipython_mode() else None
+    if loop is None or loop is asyncio.get_running_loop():
+        await dev.connect(timeout=timeout)
+    else:
+        await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(dev.connect(timeout=timeout), loop)
+        )
 
-    parent = kwargs_c["name"]
-    tasks = []
-    for key, value in kwargs_c.items():
-        parent_copy = copy.deepcopy(parent)
-        new_task = asyncio.create_task(_parse_kwarg(parent_copy, key, value, namespace))
-        tasks.append(new_task)
-    new_values = await asyncio.gather(*tasks)
-    for i, key in enumerate(kwargs_c.keys()):
-        kwargs_c[key] = new_values[i]
 
+async def _resolve_kwargs(
+    parent: str, kwargs: Dict[str, Any], namespace: Dict[str, T]
+) -> Dict[str, Any]:
+    """
+    Replace the '#device' references in the kwargs of a device with the devices.
+    Only the referenced devices are awaited; kwargs without references are passed
+    through as they are.
+    """
+    references = {
+        reference
+        for key, value in kwargs.items()
+        if key not in ["driver", "uri", "name", "md"]
+        for reference in _get_device_references(value)
+    }
+    if not references:
+        return kwargs
+    if len(references) == 1:
+        (reference,) = references
+        devices = {reference: await _get_sub_device(parent, reference, namespace)}
+    else:
+        references = list(references)
+        devices = dict(
+            zip(
+                references,
+                await asyncio.gather(
+                    *(_get_sub_device(parent, ref, namespace) for ref in references)
+                ),
+            )
+        )
+    return _substitute_references(kwargs, devices.__getitem__)
+
+
+def _substitute_references(
+    kwargs: Dict[str, Any], get_device: Callable[[str], Any]
+) -> Dict[str, Any]:
+    """
+    Return a copy of the kwargs in which every '#device' reference is replaced by
+    get_device(device_name). Dictionaries and lists are resolved one level deep, like
+    _get_device_references.
+    """
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, str) and "#device" in value:
+            return get_device(value.split("#")[0])
+        return value
+
+    resolved = {}
+    for key, value in kwargs.items():
+        if key in ["driver", "uri", "name", "md"]:
+            resolved[key] = value
+        elif isinstance(value, dict):
+            resolved[key] = {sub_key: resolve(val) for sub_key, val in value.items()}
+        elif isinstance(value, (list, set, tuple)):
+            resolved[key] = [resolve(val) for val in value]
+        else:
+            resolved[key] = resolve(value)
+    return resolved
+
+
+def _construct_device(dtype: T, uri: str | None, kwargs: Dict[str, Any]) -> T:
+    """
+    Construct a device from its resolved kwargs. Only the kwargs expected by the
+    device constructor are passed to it.
+    """
     device_handles_md = False
     # Get the list of kwargs expected by the device constructor
     expected_kwargs = dtype.__init__.__code__.co_varnames
     # Only pass the kwargs that are expected by the constructor
     good_kwargs = {
-        key: value for key, value in kwargs_c.items() if key in expected_kwargs
+        key: value for key, value in kwargs.items() if key in expected_kwargs
     }
     if "md" in expected_kwargs:
         device_handles_md = True
 
-    if is_ipython_mode():
-        with init_devices():
-            dev = dtype(uri, **good_kwargs) if uri else dtype(**good_kwargs)
-    else:
-        async with init_devices():
-            dev = dtype(uri, **good_kwargs) if uri else dtype(**good_kwargs)
+    dev = dtype(uri, **good_kwargs) if uri else dtype(**good_kwargs)
 
     # If md is a kwarg and the device does not handle md in __init__,
     # add it to the device
-    if "md" in kwargs_c and not device_handles_md:
-        dev.md = kwargs_c["md"]
+    if "md" in kwargs and not device_handles_md:
+        dev.md = kwargs["md"]
+
+    # The adaptive polling policy is set after construction, like md
+    if "polling" in kwargs and "polling" not in expected_kwargs:
+        if not hasattr(dev, "set_polling_policy"):
+            raise ValueError(f"Device type {dtype.__name__} does not support polling")
+        dev.set_polling_policy(**kwargs["polling"])
 
     return dev
 
 
-async def _parse_arg(parent: str, arg: str, namespace: Dict[str, T]) -> Any:
+async def _get_sub_device(parent: str, arg: str, namespace: Dict[str, T]) -> T:
     """
-    Parse a string that contains a device name and return the device object.
+    Get a device object from the namespace. If the device is still being created,
+    wait until its Future is resolved.
     """
-    if not isinstance(arg, str):
-        return arg
+    DEVICE_DEPENDENCIES.setdefault(parent, set()).add(arg)
+    future = DEVICE_FUTURES.get(arg)
+    if future is not None:
+        if not future.done():
+            print(f"{parent} is waiting for {arg} to be created...")
+        try:
+            # Shield the future so that a timeout in one dependent device does not
+            # cancel it for all other devices waiting on the same dependency.
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout=DEVICE_INIT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Error: {arg} not initialized. Check for circular dependencies."
+            )
 
-    if "#device" in arg:
-        device_string = arg.split("#")[0]
-        device = await _get_sub_device(parent, device_string, namespace)
+    if arg in namespace:
+        device = namespace[arg]
+        if isinstance(device, LazyDevice):
+            device = await device.connect()
         return device
 
-    return arg
+    except_string = (
+        f" {arg} not found in namespace and is not in "
+        f"the list of devices to be created. Check that all"
+        f" dependent devices are being created."
+    )
+    raise KeyError(except_string)
 
 
-async def _parse_kwarg(
-    parent: str, key: str, value: Any, namespace: Dict[str, T]
-) -> Any:
-
-    if key in ["driver", "uri", "name", "md"]:
-        return value
+def _device_init_callback(
+    task: asyncio.Task, device_name: str, namespace: Dict[str, T]
+) -> None:
+    """
+    Add the device to the namespace, remove it from the list of devices to be
+    created and resolve its Future so that dependent devices are released.
+    """
+    future = DEVICE_FUTURES.get(device_name)
+    if task.cancelled():
+        if future is not None and not future.done():
+            future.cancel()
+        return
+    exc = task.exception()
+    if exc is not None:
+        if future is not None and not future.done():
+            future.set_exception(exc)
+            # The exception is raised by asyncio.gather in create_devices. Retrieve
+            # it here so that an unawaited Future does not log it a second time.
+            future.exception()
+        return
 
-    # If the arg is a dictionary, call parse_kwarg recursively
-    if isinstance(value, dict):
-        arg = {}
-        tasks = []
-        for sub_key, val in value.items():
-            parent_copy = copy.deepcopy(parent)
-            tasks.append(_parse_arg(parent_copy, val, namespace))  # Remove await here
-        new_values = await asyncio.gather(*tasks)  # Await the tasks here
-        for i, sub_key in enumerate(value.keys()):
-            arg[sub_key] = new_values[i]
-        return arg
-
-    # If the arg is a list, call parse_kwarg recursively for each element
-
-    if isinstance(value, (list, set, tuple)):
-        tasks = []
-        for _, val in enumerate(value):
-            parent_copy = copy.deepcopy(parent)
-            new_task = asyncio.create_task(_parse_arg(parent_copy, val, namespace))
-            tasks.append(new_task)
-        arg = await asyncio.gather(*tasks)
-        return arg
-
-    if isinstance(value, str):
-        arg = await _parse_arg(parent, value, namespace)
-        return arg
-
-    return value
+    device = task.result()
+    namespace[device.name] = device
+    if device.name in DEVICES_TO_BE_CREATED:
+        DEVICES_TO_BE_CREATED.remove(device.name)
+    else:
+        print(
+            f"Error: {device.name} not in DEVICES_TO_BE_CREATED."
+            f"Nested devices may not have initialized correctly."
+        )
+    if future is not None and not future.done():
+        future.set_result(device)
+    print(f"Device {device.name} of class {device.__class__.__name__} created.")
 
 
-async def _get_sub_device(parent: str, arg: str, namespace: Dict[str, T]) -> T:
+def _get_device_references(value: Any) -> List[str]:
     """
-    Get a device object from the namespace. If the device does not exist in
-    the namespace, wait for it to be created.
+    Return the names of all devices referenced with '#device' in a kwarg value.
+    Mirrors the substitution done in _substitute_references.
     """
-    async with RESOURCE_LOCK:
-        arg_exists = arg in namespace
-    if arg_exists:
-        async with RESOURCE_LOCK:
-            device = namespace[arg]
-            return device
+    if isinstance(value, dict):
+        values = value.values()
+    elif isinstance(value, (list, set, tuple)):
+        values = value
     else:
-        # If the arg is a string but there is no object with the same name
-        # in the global namespace, check to see if the arg is a device name
-        # in the list of devices to be created in the event loop. This is a shared
-        # resource so wait for the lock to be released before checking.
-        waiting_for_dependent_device = False
-        async with RESOURCE_LOCK:
-            if arg in DEVICES_TO_BE_CREATED:
-                waiting_for_dependent_device = True
-            else:
-                except_string = (
-                    f" {arg} not found in namespace and is not in "
-                    f"the list of devices to be created. Check that all"
-                    f" dependent devices are being created."
-                )
-                raise KeyError(except_string)
-        # If we are waiting for a dependent device, sleep for one second,
-        # request the
-        # lock again and check if the device has been created.
-        loops = 0
-        while waiting_for_dependent_device:
-            print(f"{parent} is waiting for for {arg} to" f" be created...")
-            loops += 1
-            await asyncio.sleep(1)
-            async with RESOURCE_LOCK:
-                arg_exists = arg in namespace
-            if arg_exists:
-                waiting_for_dependent_device = False
-            if loops >= DEVICE_INIT_TIMEOUT:
-                raise TimeoutError(
-                    f"Error: {arg} not initialized" f".Check for circular dependencies."
-                )
-
-        if arg_exists:
-            async with RESOURCE_LOCK:
-                device = namespace[arg]
-                return device
+        values = [value]
+    return [
+        val.split("#")[0] for val in values if isinstance(val, str) and "#device" in val
+    ]
 
 
-def _device_init_callback(task: asyncio.Task, namespace: Dict[str, T]) -> None:
+def _get_dependencies(devlist: Dict) -> Dict[str, Set[str]]:
     """
-    Sync callback to call remove_device_name_on_task_end asynchronously.
+    Build the dependency graph of the device list.
+
+    :param devlist: Dictionary of device types and their URIs
+    :return: Dictionary mapping each device name to the names of the devices in the
+             device list it depends on. References to devices which are not in the
+             device list are resolved from the namespace and are not part of the graph.
     """
-    asyncio.create_task(_add_to_namespace(task, namespace))
+    dependencies = {device: set() for device in devlist}
+    for device, device_info in devlist.items():
+        for key, value in device_info.get("kwargs", {}).items():
+            if key in ["driver", "uri", "name", "md"]:
+                continue
+            for reference in _get_device_references(value):
+                if reference in devlist:
+                    dependencies[device].add(reference)
+    return dependencies
 
 
-async def _add_to_namespace(task: asyncio.Task, namespace: Dict[str, T]) -> None:
+def _get_creation_order(dependencies: Dict[str, Set[str]]) -> List[str]:
     """
-    Add the device to the global namespace and remove it from the list of devices to be
-    created.
+    Sort the device names topologically (Kahn's algorithm), dependencies first.
+
+    :param dependencies: Dependency graph as returned by _get_dependencies
+    :raises ValueError: If the graph contains a circular dependency
     """
-    device = task.result()
-    async with RESOURCE_LOCK:
-        try:
-            namespace[device.name] = device
-            if task.result().name in DEVICES_TO_BE_CREATED:
-                DEVICES_TO_BE_CREATED.remove(task.result().name)
-            else:
-                print(
-                    f"Error: {task.result().name} not in DEVICES_TO_BE_CREATED."
-                    f"Nested devices may not have initialized correctly."
-                )
-            print(f"Device {device.name} of class {device.__class__.__name__} created.")
-        except ValueError as exc:
-            raise exc
+    dependents = {device: [] for device in dependencies}
+    remaining = {}
+    for device, device_dependencies in dependencies.items():
+        remaining[device] = len(device_dependencies)
+        for dependency in device_dependencies:
+            dependents[dependency].append(device)
+
+    ready = [device for device, count in remaining.items() if count == 0]
+    order = []
+    while ready:
+        device = ready.pop()
+        order.append(device)
+        for dependent in dependents[device]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(dependencies):
+        unresolved = sorted(set(dependencies) - set(order))
+        raise ValueError(
+            f"Error: Circular dependency found between devices: {unresolved}"
+        )
+    return order
 
 
-# FIX THIS AT SOME POINT
-def _check_circular_dependencies(devlist: Dict) -> None:
+def _check_device_list(
+    devlist: Dict,
+    dependencies: Dict[str, Set[str]],
+    namespace: Dict[str, T],
+    profile: StartupProfile | None = None,
+) -> None:
     """
-    Check for circular dependencies in the device list via a depth-first search.
+    Validate the device list before any device is created. All problems are
+    collected in a single pass and reported together:
+
+    - circular dependencies (every strongly connected component of the dependency
+      graph, found with Tarjan's algorithm),
+    - '#device' references to devices which are neither in the device list nor in
+      the namespace,
+    - drivers which are neither in the namespace nor importable.
 
     :param devlist: Dictionary of device types and their URIs
-    :raises ValueError: If a circular dependency is found
+    :param dependencies: Dependency graph as returned by _get_dependencies
+    :param namespace: Namespace the devices are created in
+    :param profile: StartupProfile recording the import of each driver as the
+                    resolve driver phase of its device
+    :raises ValueError: If the device list contains any of the problems above
     """
-    dependencies = {device: set() for device in devlist}
+    errors = []
+
+    for cycle in _find_cycles(dependencies):
+        errors.append(f"Circular dependency between devices: {', '.join(cycle)}")
 
     for device, device_info in devlist.items():
-        kwargs = device_info.get("kwargs", {})
-        for key, value in kwargs.items():
-            if isinstance(value, str) and "#device" in value:
-                parts = value.split("#")
-                dependencies[device].add(parts[0])
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, str) and "#device" in item:
-                        parts = item.split("#")
-                        dependencies[device].add(parts[0])
-            elif isinstance(value, dict):
-                for sub_value in value.values():
-                    if isinstance(sub_value, str) and "#device" in sub_value:
-                        parts = sub_value.split("#")
-                        dependencies[device].add(parts[0])
-
-    for device in devlist:
-        visited = set()
-        stack = [device]
-        while stack:
-            current = stack[-1]
-            if current in visited:
-                raise ValueError(
-                    f"Circular dependency found: {device} depends on" f" itself."
-                )
-            visited.add(current)
-            for dependent in dependencies[current]:
-                if dependent not in visited:
-                    stack.append(dependent)
-            if current == stack[-1]:
-                stack.pop()
+        for key, value in device_info.get("kwargs", {}).items():
+            if key in ["driver", "uri", "name", "md"]:
+                continue
+            for reference in _get_device_references(value):
+                if reference not in devlist and reference not in namespace:
+                    errors.append(
+                        f"Device {device} references {reference}#device in kwarg"
+                        f" '{key}', but {reference} is neither in the device list"
+                        f" nor in the namespace"
+                    )
+
+        driver = device_info.get("driver")
+        if driver in namespace:
+            continue
+        timed = profile.phase(device, RESOLVE_DRIVER) if profile else None
+        try:
+            with timed or contextlib.nullcontext():
+                _get_device_type(driver)
+        except (ImportError, AttributeError, ValueError, TypeError) as exc:
+            errors.append(f"Device {device} has unknown driver '{driver}': {exc}")
+
+    if errors:
+        raise ValueError(
+            "Error: Invalid device list:\n" + "\n".join(f"  - {e}" for e in errors)
+        )
 
 
+def _find_cycles(dependencies: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Find all circular dependencies with an iterative version of Tarjan's strongly
+    connected components algorithm, which runs in linear time.
+
+    :param dependencies: Dependency graph as returned by _get_dependencies
+    :return: The sorted device names of every strongly connected component which
+             contains a cycle, including devices which depend on themselves.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    cycles = []
+
+    for root in dependencies:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(dependencies[root]))]
+        while work:
+            device, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(dependencies[successor])))
+                    break
+                if successor in on_stack:
+                    lowlink[device] = min(lowlink[device], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[device])
+                if lowlink[device] == index[device]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == device:
+                            break
+                    if len(component) > 1 or device in dependencies[device]:
+                        cycles.append(sorted(component))
+    return cycles
+
+
+@functools.lru_cache(maxsize=None)
 def _get_device_type(type_string: str) -> T:
+    """
+    Import and return the device class for a driver string of the form
+    'package.module.ClassName'. Resolved classes are cached, so every driver is only
+    imported and looked up once.
+    """
     # Try to import the module
     try:
-        try:
-            module_name, class_name = type_string.rsplit(".", 1)
-        except ValueError:
-            module_name, class_name = type_string
+        module_name, class_name = type_string.rsplit(".", 1)
+    except ValueError:
+        raise ValueError(
+            f"Error: Driver '{type_string}' must have the form 'module.ClassName'."
+        )
+    try:
         module = importlib.import_module(module_name)
         device_type = getattr(module, class_name)
     except ImportError as exc:
         raise ImportError(f"Error: {exc}.")
-    except KeyError as exc:
-        raise KeyError(f"Error: {exc}.")
+    except AttributeError:
+        raise AttributeError(
+            f"Error: Module '{module_name}' has no driver class '{class_name}'."
+        )
     return device_type
 
 
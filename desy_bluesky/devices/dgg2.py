@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Annotated as A
 
+import asyncio
+
 from bluesky.protocols import Triggerable, Stoppable
 
 from ophyd_async.core import (
@@ -11,24 +13,118 @@ from ophyd_async.core import (
     SignalRW,
     SignalR,
     StandardReadableFormat as Format,
+    observe_value,
+    wait_for_value,
 )
 from ophyd_async.tango.core import TangoPolling, DevStateEnum
 
 from .fsec_readable_device import FSECReadableDevice
 
-# TODO: SAWFT only works for SampleTime < 3.0 seconds. Solve this.
+# StartAndWaitForTimer (SAWFT) blocks a Tango call for the whole exposure and only
+# works for SampleTime < 3.0 seconds. Longer gates are started with Start and
+# completed on the State transition instead.
+SAWFT_MAX_SAMPLE_TIME = 3.0
 
 
 class DGG2Timer(FSECReadableDevice, Triggerable, Stoppable):
+    """
+    DGG2 gate generator
+
+    The trigger mode selects how a gate is run:
+
+    - "wait": read StartAndWaitForTimer, which returns when the gate is done,
+    - "state": send Start and wait until State returns to ON, driven by Tango change
+      events with support_events=True (the server must send change events for
+      State), otherwise by the State polling. The timeout is SampleTime +
+      DEFAULT_TIMEOUT.
+    - "auto": "wait" for SampleTime < 3 s, "state" otherwise.
+    """
+
     SampleTime: A[SignalRW[float], Format.HINTED_UNCACHED_SIGNAL]
     Stop: SignalR[int]
     State: A[SignalR[DevStateEnum], TangoPolling(0.01)]
     StartAndWaitForTimer: SignalR[int]
 
+    def __init__(
+        self,
+        trl: str,
+        name: str = "",
+        trigger_mode: str = "auto",
+        support_events: bool = False,
+        auto_fill_signals: bool = True,
+    ) -> None:
+        if trigger_mode not in ("wait", "state", "auto"):
+            raise ValueError(f"Unknown DGG2 trigger mode '{trigger_mode}'")
+        self.trigger_mode = trigger_mode
+        super().__init__(
+            trl=trl,
+            support_events=support_events,
+            name=name,
+            auto_fill_signals=auto_fill_signals,
+        )
+
     @AsyncStatus.wrap
     async def trigger(self) -> None:
-        sample_time = await self.SampleTime.get_value()
-        await self.StartAndWaitForTimer.get_value()
+        await self.run_gate(await self.arm())
+
+    async def arm(self) -> float:
+        """
+        Prepare a gate and return its sample time. Devices which have to do work
+        before the gate starts (e.g. resetting counters) can do it concurrently
+        with arm and then call run_gate.
+        """
+        self._mark_active()
+        return await self.SampleTime.get_value()
+
+    async def run_gate(self, sample_time: float) -> None:
+        """Run one gate of the sample time returned by arm."""
+        if self.trigger_mode == "wait" or (
+            self.trigger_mode == "auto" and sample_time < SAWFT_MAX_SAMPLE_TIME
+        ):
+            await self.StartAndWaitForTimer.get_value()
+        else:
+            await self._start_and_wait_for_state(sample_time)
+
+    async def _start_and_wait_for_state(self, sample_time: float) -> None:
+        started = asyncio.Event()
+
+        async def gate_time():
+            await started.wait()
+            await asyncio.sleep(sample_time)
+
+        # A gate shorter than the State polling period may never show as running, so
+        # stop watching for the transition once the gate time is over
+        gate_over = AsyncStatus(gate_time())
+        running_seen = False
+        try:
+            async for state in observe_value(self.State, done_status=gate_over):
+                if not started.is_set():
+                    # The first value is the current state. The gate is only started
+                    # once the State subscription is active, so that no transition
+                    # is missed.
+                    await self._start_gate()
+                    started.set()
+                elif state in (DevStateEnum.FAULT, DevStateEnum.ALARM):
+                    raise RuntimeError(f"{self.name} went to {state} during the gate")
+                elif state != DevStateEnum.ON:
+                    running_seen = True
+                elif running_seen:
+                    return
+        finally:
+            if not gate_over.done:
+                gate_over.task.cancel()
+        await wait_for_value(self.State, DevStateEnum.ON, timeout=DEFAULT_TIMEOUT)
+
+    async def _start_gate(self) -> None:
+        # Start is filled from the server, as a command or as an attribute which
+        # starts the gate when it is read, like Stop
+        start = getattr(self, "Start", None)
+        if isinstance(start, SignalX):
+            await start.trigger()
+        elif isinstance(start, SignalR):
+            await start.get_value()
+        else:
+            raise RuntimeError(f"{self.name} has no Start to run a gate in state mode")
 
     @AsyncStatus.wrap
     async def stop(self, success: bool = True):
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Annotated as A
+from typing import Annotated as A, AsyncIterator, Dict, List, Sequence
+
+import asyncio
+import time
 
 import numpy as np
 
@@ -9,9 +12,12 @@ from bluesky.protocols import (
     Stoppable,
     SyncOrAsync,
     Preparable,
+    Reading,
 )
+from event_model import DataKey
 
 from ophyd_async.core import (
+    DEFAULT_TIMEOUT,
     WatchableAsyncStatus,
     AsyncStatus,
     SignalRW,
@@ -20,14 +26,18 @@ from ophyd_async.core import (
     StandardReadableFormat as Format,
     WatcherUpdate,
     soft_signal_rw,
-    observe_value,
 )
 from ophyd_async.tango.core import (
     TangoPolling,
 )
 
 
-from .fsec_readable_device import FSECReadableDevice, FSECSubscribable
+from .fsec_readable_device import (
+    FSECReadableDevice,
+    FSECSubscribable,
+    _get_attribute_proxy,
+)
+from .settle_engine import SettleEngine
 
 
 class Eurotherm3216(FSECSubscribable, FSECReadableDevice, Movable, Stoppable, Preparable):
@@ -53,6 +63,19 @@ class Eurotherm3216(FSECSubscribable, FSECReadableDevice, Movable, Stoppable, Pr
     setpoint_tolerance : SignalRW[float]
         The tolerance for setting the setpoint (deg C). Default is 2.0 deg C
         Setpoint is considered set when the temperature is within this tolerance.
+    settle_window : SignalRW[int]
+        Number of temperature samples (one per polling period) which must be within
+        the tolerance. Default is 1.
+    settle_max_slope : SignalRW[float]
+        Largest slope (deg C/min) of the samples in the window, 0 to not check it.
+    settle_max_std : SignalRW[float]
+        Largest standard deviation (deg C) of the samples in the window, 0 to not
+        check it.
+
+    set accepts a setpoint or a ramp/soak profile, see set. The profile runs in the
+    device, so a plan only waits for one status:
+
+        yield from bps.mv(eurotherm, [(100, 10.0, 600), (200, 5.0, 1200), (25, None)])
     """
 
     Temperature: A[SignalR[float], Format.HINTED_SIGNAL, TangoPolling(1.0, 0.1)]
@@ -72,6 +95,11 @@ class Eurotherm3216(FSECSubscribable, FSECReadableDevice, Movable, Stoppable, Pr
             self.setpoint_tolerance = soft_signal_rw(
                 float, 2.0, "setpoint_tolerance", "C"
             )
+            self.settle_window = soft_signal_rw(int, 1, "settle_window")
+            self.settle_max_slope = soft_signal_rw(
+                float, 0.0, "settle_max_slope", "C/min"
+            )
+            self.settle_max_std = soft_signal_rw(float, 0.0, "settle_max_std", "C")
         super().__init__(trl=trl, name=name)
         self._set_success = False
 
@@ -80,34 +108,67 @@ class Eurotherm3216(FSECSubscribable, FSECReadableDevice, Movable, Stoppable, Pr
         await self.SetpointRamp.set(value)
 
     @WatchableAsyncStatus.wrap
-    async def set(self, value: float, timeout=None):
+    async def set(self, value: float | Sequence, timeout=None):
+        """
+        Go to a setpoint, or run a ramp/soak profile given as a list of segments
+        (setpoint, ramp, soak): ramp is written to SetpointRamp (None keeps the
+        current rate), and soak is the time in seconds to hold the setpoint once the
+        temperature is settled. The timeout applies to the whole profile.
+        """
+        segments = _profile_segments(value)
         self._set_success = True
-        old_temperature = await self.Temperature.get_value()
-        tol = await self.setpoint_tolerance.get_value()
-        move_status = AsyncStatus(
-            set_and_wait_for_other_value(
-                self.Setpoint,
-                value,
-                self.Temperature,
-                lambda v: np.isclose(v, value, atol=tol),
-                timeout=timeout,
-            )
+        self._mark_active()
+        initial, ramp = await asyncio.gather(
+            self.Temperature.get_value(), self.SetpointRamp.get_value()
         )
-
-        try:
-            async for current_temperature in observe_value(
-                self.Temperature, done_status=move_status
-            ):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        start = time.monotonic()
+        target = segments[-1][0]
+        last = initial
+        for i, (setpoint, segment_ramp, soak) in enumerate(segments):
+            if segment_ramp is not None:
+                await self.SetpointRamp.set(segment_ramp)
+                ramp = segment_ramp
+            later = _profile_duration(segments[i + 1:], setpoint, ramp) + soak
+            async for temperature, eta in self._settle(setpoint, ramp, deadline):
+                last = temperature
                 yield WatcherUpdate(
-                    current=current_temperature,
-                    initial=old_temperature,
-                    target=value,
+                    current=temperature,
+                    initial=initial,
+                    target=target,
                     name=self.name,
+                    unit="C",
+                    time_elapsed=time.monotonic() - start,
+                    time_remaining=None if eta is None else eta + later,
+                )
+            soak_end = time.monotonic() + soak
+            while time.monotonic() < soak_end:
+                await asyncio.sleep(min(soak_end - time.monotonic(), 1.0))
+                if not self._set_success:
+                    raise RuntimeError(f"{self.name} was stopped")
+                yield WatcherUpdate(
+                    current=last,
+                    initial=initial,
+                    target=target,
+                    name=self.name,
+                    unit="C",
+                    time_elapsed=time.monotonic() - start,
+                    time_remaining=max(soak_end - time.monotonic(), 0.0)
+                    + later
+                    - soak,
                 )
-        except RuntimeError as exc:
-            raise RuntimeError(f"{exc}") from exc
         if not self._set_success:
-            raise RuntimeError("Motor was stopped")
+            raise RuntimeError(f"{self.name} was stopped")
+
+    async def _settle(
+        self, target: float, ramp: float, deadline: float | None
+    ) -> AsyncIterator[tuple[float, float | None]]:
+        """
+        Write the setpoint and yield the temperature and the predicted seconds to
+        reach the target until the temperature is settled, see _settle_all.
+        """
+        async for values, etas in _settle_all([self], [target], [ramp], deadline):
+            yield values[self.name], etas[self.name]
 
     def stop(self, success: bool = False) -> SyncOrAsync:
         self._set_success = success
@@ -123,3 +184,318 @@ class Eurotherm3216(FSECSubscribable, FSECReadableDevice, Movable, Stoppable, Pr
             )
 
         return _stop()
+
+
+class Eurotherm3216Array(Movable, Stoppable, Preparable):
+    """
+    Drives several Eurotherm3216 controllers together, e.g. a furnace array.
+
+    All setpoints are written concurrently and one loop watches all controllers with
+    one queue, fed by the Temperature subscriptions which the controllers keep
+    anyway. Updates arriving together are handled as one batch, so the status
+    reports combined progress with one WatcherUpdate per batch: current is the
+    fraction of the total temperature change done (0 - 1) and time_remaining the
+    ETA of the slowest controller. Each controller settles with its own tolerance
+    and settle criteria.
+
+    The array works on controllers created elsewhere (usually referenced with
+    '#device' in the device list) and does not take them over as children. It
+    can be read like one device, so it can be used as positioner of the ramp plans:
+
+        furnaces = Eurotherm3216Array([e1, e2, e3], name="furnaces")
+        yield from bps.mv(furnaces, 300.0)
+        yield from bps.mv(furnaces, [300.0, 310.0, 320.0])
+        yield from bps.mv(furnaces, {"e2": 250.0})
+    """
+
+    def __init__(self, controllers: List[Eurotherm3216], name: str = "") -> None:
+        if not controllers:
+            raise ValueError("Eurotherm3216Array needs at least one controller")
+        self.controllers = list(controllers)
+        self._name = name
+        self.parent = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def __repr__(self):
+        return self.name
+
+    async def connect(self, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> None:
+        """The controllers are connected on their own."""
+
+    async def read(self) -> Dict[str, Reading]:
+        readings = {}
+        for reading in await asyncio.gather(*(c.read() for c in self.controllers)):
+            readings.update(reading)
+        return readings
+
+    async def describe(self) -> Dict[str, DataKey]:
+        data_keys = {}
+        for keys in await asyncio.gather(*(c.describe() for c in self.controllers)):
+            data_keys.update(keys)
+        return data_keys
+
+    def _setpoints(self, value) -> List[tuple[Eurotherm3216, float]]:
+        if isinstance(value, dict):
+            controllers = {c.name: c for c in self.controllers}
+            unknown = set(value) - set(controllers)
+            if unknown:
+                raise KeyError(f"{self.name} has no controllers {sorted(unknown)}")
+            return [(controllers[name], float(sp)) for name, sp in value.items()]
+        if np.isscalar(value):
+            return [(c, float(value)) for c in self.controllers]
+        if len(value) != len(self.controllers):
+            raise ValueError(
+                f"{self.name} needs {len(self.controllers)} setpoints, "
+                f"got {len(value)}"
+            )
+        return [(c, float(sp)) for c, sp in zip(self.controllers, value)]
+
+    @AsyncStatus.wrap
+    async def prepare(self, value):
+        """Set the SetpointRamp of all controllers."""
+        await asyncio.gather(*(c.SetpointRamp.set(value) for c in self.controllers))
+
+    @WatchableAsyncStatus.wrap
+    async def set(self, value, timeout=None):
+        """
+        Go to one setpoint for all controllers, a list of setpoints (one per
+        controller) or a dict of controller names and setpoints.
+        """
+        setpoints = self._setpoints(value)
+        controllers = [c for c, _ in setpoints]
+        targets = [sp for _, sp in setpoints]
+        for controller in controllers:
+            controller._set_success = True
+            controller._mark_active()
+        initial = await asyncio.gather(
+            *(c.Temperature.get_value() for c in controllers)
+        )
+        ramps = await asyncio.gather(
+            *(c.SetpointRamp.get_value() for c in controllers)
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        start = time.monotonic()
+        distances = [abs(t - i) for t, i in zip(targets, initial)]
+        total = sum(distances)
+        async for values, etas in _settle_all(controllers, targets, ramps, deadline):
+            done = 0.0
+            for c, target, init, distance in zip(
+                controllers, targets, initial, distances
+            ):
+                if etas.get(c.name) == 0.0:
+                    # settled controllers count as done
+                    done += distance
+                elif distance and c.name in values:
+                    done += distance * np.clip(
+                        (values[c.name] - init) / (target - init), 0.0, 1.0
+                    )
+            remaining = list(etas.values())
+            yield WatcherUpdate(
+                current=float(done / total) if total else 1.0,
+                initial=0.0,
+                target=1.0,
+                name=self.name,
+                unit="",
+                time_elapsed=time.monotonic() - start,
+                time_remaining=(
+                    None if None in remaining or not remaining else max(remaining)
+                ),
+            )
+
+    @AsyncStatus.wrap
+    async def stop(self, success: bool = False):
+        await asyncio.gather(*(c.stop(success=success) for c in self.controllers))
+
+
+async def _settle_all(
+    controllers: List[Eurotherm3216],
+    targets: List[float],
+    ramps: List[float],
+    deadline: float | None,
+) -> AsyncIterator[tuple[Dict[str, float], Dict[str, float | None]]]:
+    """
+    Write the setpoints of the controllers and yield their last temperatures and
+    predicted seconds to reach the targets, until all of them are settled.
+
+    One loop watches all controllers with one queue. The temperature updates of
+    the subscriptions only arrive when the temperature changes, so every settle
+    engine is also fed once per polling period, with the last reading of the
+    polling (no extra Tango call) or the last value. When a target is predicted to
+    be reached within one polling period, the temperatures of these controllers are
+    read once at that time, so that the end of the move is not detected up to a
+    polling period late.
+    """
+    configs = await asyncio.gather(
+        *(
+            asyncio.gather(
+                c.setpoint_tolerance.get_value(),
+                c.settle_window.get_value(),
+                c.settle_max_slope.get_value(),
+                c.settle_max_std.get_value(),
+            )
+            for c in controllers
+        )
+    )
+    engines = {
+        c.name: SettleEngine(tol, window, max_slope or None, max_std or None)
+        for c, (tol, window, max_slope, max_std) in zip(controllers, configs)
+    }
+    by_name = {
+        c.name: (c, target, ramp)
+        for c, target, ramp in zip(controllers, targets, ramps)
+    }
+    proxies = {c.name: _get_attribute_proxy(c.Temperature) for c in controllers}
+    period = min(
+        (p._polling_period for p in proxies.values() if p is not None), default=1.0
+    )
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    callbacks = {}
+
+    def on_update(name: str):
+        def update(value):
+            # Tango events arrive on a Tango thread
+            loop.call_soon_threadsafe(queue.put_nowait, (name, value, False))
+
+        return update
+
+    async def probe(names: List[str], delay: float, extra: bool = True):
+        await asyncio.sleep(delay)
+        signals = [by_name[name][0].Temperature for name in names]
+        readings = await asyncio.gather(*(s.read(cached=False) for s in signals))
+        for name, signal, reading in zip(names, signals, readings):
+            queue.put_nowait((name, reading[signal.name]["value"], extra))
+
+    for c in controllers:
+        callbacks[c.name] = on_update(c.name)
+        c.Temperature.subscribe_value(callbacks[c.name])
+    probe_task = None
+    probed = False
+    pending = set(by_name)
+    values: Dict[str, float] = {}
+    etas: Dict[str, float | None] = {}
+    sampled = {name: 0.0 for name in by_name}
+    last_polled = {name: 0.0 for name in by_name}
+    try:
+        await asyncio.gather(
+            *(c.Setpoint.set(target) for c, target in zip(controllers, targets))
+        )
+        # The cached values of the subscriptions may be older than the writes, so
+        # start with fresh readings
+        while not queue.empty():
+            queue.get_nowait()
+        probe_task = asyncio.create_task(probe(list(by_name), 0.0, extra=False))
+        started = time.monotonic()
+        while pending:
+            now = time.monotonic()
+            # Wait until the next update or the next sample of the polling is due
+            wait = max(
+                min(max(sampled[name], started) + period for name in pending) - now,
+                0.0,
+            )
+            if deadline is not None:
+                if deadline - now <= 0:
+                    raise asyncio.TimeoutError(
+                        f"{', '.join(sorted(pending))} did not settle in time"
+                    )
+                wait = min(wait, deadline - now)
+            batch = []
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), wait))
+                # Handle everything which arrived together as one batch
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            updated = {name for name, _, _ in batch}
+            for name in pending - updated:
+                if now - max(sampled[name], started) < period:
+                    continue
+                sampled[name] = now
+                if name not in values:
+                    continue
+                # No change: take the last reading of the polling if it is newer
+                value = values[name]
+                proxy = proxies[name]
+                if proxy is not None:
+                    polled = proxy._last_reading
+                    if polled["timestamp"] > last_polled[name]:
+                        value = polled["value"]
+                        last_polled[name] = polled["timestamp"]
+                batch.append((name, value, False))
+            if not batch:
+                continue
+            for c in controllers:
+                if not c._set_success:
+                    raise RuntimeError(f"{c.name} was stopped")
+            for name, value, _ in batch:
+                values[name] = value
+                if name not in pending:
+                    continue
+                sampled[name] = now
+                _, target, ramp = by_name[name]
+                engine = engines[name]
+                # Samples are timed on arrival, event and polling timestamps may
+                # come from different clocks
+                engine.add(time.time(), value)
+                if engine.settled(target):
+                    pending.discard(name)
+                    etas[name] = 0.0
+                else:
+                    etas[name] = engine.eta(target, ramp)
+            yield dict(values), dict(etas)
+            # At most one extra read between two samples of the polling
+            probed = probed and all(extra for _, _, extra in batch)
+            due = [
+                name
+                for name in pending
+                if etas.get(name) is not None and 0 < etas[name] < period
+            ]
+            if due and not probed and probe_task.done():
+                probed = True
+                probe_task = asyncio.create_task(
+                    probe(due, min(etas[name] for name in due))
+                )
+    finally:
+        for c in controllers:
+            c.Temperature.clear_sub(callbacks[c.name])
+        if probe_task is not None:
+            probe_task.cancel()
+
+
+def _profile_segments(value) -> List[tuple[float, float | None, float]]:
+    """Return the (setpoint, ramp, soak) segments of a setpoint or a profile."""
+    if np.isscalar(value):
+        return [(float(value), None, 0.0)]
+    segments = []
+    for segment in value:
+        if np.isscalar(segment):
+            segments.append((float(segment), None, 0.0))
+            continue
+        if not 1 <= len(segment) <= 3:
+            raise ValueError(
+                f"Profile segments are (setpoint, ramp, soak), got {segment}"
+            )
+        setpoint, ramp, soak = (list(segment) + [None, 0.0])[:3]
+        segments.append((float(setpoint), ramp, float(soak or 0.0)))
+    if not segments:
+        raise ValueError("Empty temperature profile")
+    return segments
+
+
+def _profile_duration(
+    segments: List[tuple[float, float | None, float]], start: float, ramp: float
+) -> float:
+    """Estimate the seconds needed for the segments from the start setpoint on."""
+    duration = 0.0
+    for setpoint, segment_ramp, soak in segments:
+        ramp = segment_ramp if segment_ramp is not None else ramp
+        if ramp:
+            duration += abs(setpoint - start) / abs(ramp) * 60.0
+        duration += soak
+        start = setpoint
+    return duration
@@ -1,27 +1,415 @@
 from __future__ import annotations
 
-from typing import TypeVar
+from typing import Dict, List, TypeVar
 from typing import Annotated as A
-import time
+import asyncio
+import collections
+import concurrent.futures
+
+from types import SimpleNamespace
 
 from bluesky.protocols import Subscribable, Callback, Reading
 
-from ophyd_async.core import SignalR, StandardReadable
-from ophyd_async.tango.core import TangoPolling, DevStateEnum, TangoDevice
-from ophyd_async.core._utils import LazyMock, DEFAULT_TIMEOUT
-from tango import DevState
+from ophyd_async.core import Device, DeviceConnector, SignalR, StandardReadable
+from ophyd_async.tango.core import (
+    AttributeProxy,
+    TangoPolling,
+    DevStateEnum,
+    TangoDevice,
+    TangoDeviceConnector,
+    TangoSignalBackend,
+    ensure_proper_executor,
+    get_device_trl_and_attr,
+    get_full_attr_trl,
+    infer_python_type,
+    infer_signal_type,
+)
+from ophyd_async.core._readable import _UncachedRead
+from ophyd_async.core._utils import LazyMock, DEFAULT_TIMEOUT, merge_gathered_dicts
+from tango import AttrDataFormat, AttrWriteType, CmdArgType, DevState
+from tango.asyncio import DeviceProxy as AsyncDeviceProxy
+
+from .attribute_cache import get_attribute_cache
+from .polling_policy import PollingEngine, PollingPolicy
+from .signal_history import SignalHistory
 
 FSECDeviceConfig = TypeVar("FSECDeviceConfig")
 
 
+class _CachedIntrospection:
+    """
+    Answers the queries infer_signal_type and infer_python_type make to a
+    DeviceProxy from an introspection stored in the attribute cache.
+    """
+
+    def __init__(self, introspection: Dict) -> None:
+        self._introspection = introspection
+
+    def get_attribute_list(self) -> List[str]:
+        return self._introspection["attributes"]
+
+    def get_command_list(self) -> List[str]:
+        return self._introspection["commands"]
+
+    async def get_attribute_config(self, name: str) -> SimpleNamespace:
+        config = self._introspection["attribute_configs"][name]
+        return SimpleNamespace(
+            writable=AttrWriteType.values[config["writable"]],
+            data_type=CmdArgType.values[config["data_type"]],
+            data_format=AttrDataFormat.values[config["data_format"]],
+            enum_labels=config["enum_labels"],
+        )
+
+    async def get_command_config(self, name: str) -> SimpleNamespace:
+        config = self._introspection["command_configs"][name]
+        return SimpleNamespace(
+            in_type=CmdArgType.values[config["in_type"]],
+            out_type=CmdArgType.values[config["out_type"]],
+        )
+
+
+async def _introspect(proxy, names: List[str]) -> Dict:
+    """
+    Query the attribute and command lists of a device and the configs of the given
+    attributes and commands, concurrently, in a JSON serialisable form.
+    """
+    attributes = list(proxy.get_attribute_list())
+    commands = list(proxy.get_command_list())
+    attribute_names = [name for name in names if name in attributes]
+    # State and Status are both attributes and commands
+    command_names = [name for name in names if name in commands]
+    attribute_configs = await asyncio.gather(
+        *(proxy.get_attribute_config(name) for name in attribute_names)
+    )
+    command_configs = await asyncio.gather(
+        *(proxy.get_command_config(name) for name in command_names)
+    )
+    return {
+        "attributes": attributes,
+        "commands": commands,
+        "attribute_configs": {
+            name: {
+                "writable": int(config.writable),
+                "data_type": int(config.data_type),
+                "data_format": int(config.data_format),
+                "enum_labels": list(config.enum_labels),
+            }
+            for name, config in zip(attribute_names, attribute_configs)
+        },
+        "command_configs": {
+            name: {"in_type": int(config.in_type), "out_type": int(config.out_type)}
+            for name, config in zip(command_names, command_configs)
+        },
+    }
+
+
+class _CachingTangoDeviceConnector(TangoDeviceConnector):
+    """
+    TangoDeviceConnector which takes the introspection the signals are inferred from
+    from the active attribute cache, see attribute_cache. Without an active cache it
+    connects as TangoDeviceConnector. The signals still connect to their attributes
+    as usual.
+    """
+
+    async def connect_real(self, device: Device, timeout: float, force_reconnect: bool):
+        cache = get_attribute_cache()
+        if cache is None:
+            return await super().connect_real(device, timeout, force_reconnect)
+        if not self.trl:
+            raise RuntimeError(f"Could not created Device Proxy for TRL {self.trl}")
+        self.proxy = await AsyncDeviceProxy(self.trl)
+
+        not_filled = {unfilled for unfilled, _ in device.children()}
+        introspection = cache.get_introspection(self.trl)
+        if introspection is not None:
+            names = self._names_to_fill(introspection, not_filled)
+            configs = {
+                **introspection["attribute_configs"],
+                **introspection["command_configs"],
+            }
+            if not set(names) <= set(configs):
+                # Cached by a device which fills fewer signals
+                introspection = None
+        if introspection is None:
+            children = set(self.proxy.get_attribute_list()).union(
+                self.proxy.get_command_list()
+            )
+            names = self._names_to_fill(
+                {"attributes": children, "commands": []}, not_filled
+            )
+            introspection = await _introspect(self.proxy, names)
+            cache.set_introspection(self.trl, introspection)
+
+        # Fill the signals as TangoDeviceConnector.connect_real does
+        cached_proxy = _CachedIntrospection(introspection)
+        for name in names:
+            full_trl = get_full_attr_trl(self.trl, name)
+            signal_type = await infer_signal_type(full_trl, cached_proxy)
+            if signal_type:
+                backend = self.filler.fill_child_signal(name, signal_type)
+                if backend.datatype is None:
+                    backend.datatype = await infer_python_type(full_trl, cached_proxy)
+                backend.set_trl(full_trl)
+        self.filler.check_filled(f"{self.trl}: {names}")
+        device.set_name(device.name)
+        return await DeviceConnector.connect_real(
+            self, device, timeout, force_reconnect
+        )
+
+    def _names_to_fill(self, introspection: Dict, not_filled: set) -> List[str]:
+        children = sorted(
+            set(introspection["attributes"]).union(introspection["commands"])
+        )
+        return [
+            name
+            for name in children
+            if name not in self.filler.ignored_signals
+            and (self._auto_fill_signals or name in not_filled)
+        ]
+
+
 class FSECReadableDevice(TangoDevice, StandardReadable):
     State: A[SignalR[DevStateEnum], TangoPolling(0.1)]
 
+    _polling_engine: PollingEngine | None = None
+
+    def __init__(
+        self,
+        trl: str | None,
+        support_events: bool = False,
+        name: str = "",
+        auto_fill_signals: bool = True,
+    ) -> None:
+        connector = _CachingTangoDeviceConnector(
+            trl=trl,
+            support_events=support_events,
+            auto_fill_signals=auto_fill_signals,
+        )
+        # TangoDevice.__init__ would create a plain TangoDeviceConnector
+        super(TangoDevice, self).__init__(name=name, connector=connector)
+
     def __repr__(self):
         return self.name
 
+    def set_polling_policy(self, **kwargs) -> None:
+        """
+        Poll the TangoPolling-annotated signals of the device adaptively, see
+        PollingPolicy for the arguments. Takes effect on the next connect.
+        """
+        self._polling_engine = PollingEngine(self, PollingPolicy(**kwargs))
+
+    async def connect(
+        self,
+        mock: bool | LazyMock = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        force_reconnect: bool = False,
+    ) -> None:
+        await super().connect(
+            mock=mock, timeout=timeout, force_reconnect=force_reconnect
+        )
+        if self._polling_engine is not None and not mock:
+            self._polling_engine.start()
+
+    def disconnect(self):
+        if self._polling_engine is not None:
+            self._polling_engine.stop()
+
+    def _mark_active(self) -> None:
+        """Tell the polling engine that the device starts moving or acquiring."""
+        if self._polling_engine is not None:
+            self._polling_engine.activate()
+
+    async def _read_values(self, *signals: SignalR) -> list:
+        """
+        Return the values of several signals of the device, read with one
+        read_attributes call if they are all Tango attributes.
+        """
+        bulk = [(signal, _get_attribute_proxy(signal)) for signal in signals]
+        if any(attr_proxy is None for _, attr_proxy in bulk):
+            return list(await asyncio.gather(*(signal.get_value() for signal in signals)))
+        readings = await _read_attributes(bulk)
+        return [readings[signal.name]["value"] for signal in signals]
+
+    async def read(self) -> dict[str, Reading]:
+        """
+        Read the device. Signals which would each read their Tango attribute
+        (uncached signals and cached signals without a subscription) are grouped per
+        Tango device and read with one read_attributes call per device. All other
+        read functions are called as in StandardReadable.
+        """
+        funcs = []
+        # Every signal has its own DeviceProxy, so group by the device TRL
+        bulk: Dict[str, List[tuple[SignalR, AttributeProxy]]] = {}
+        for func in self._read_funcs:
+            signal, attr_proxy = _get_bulk_readable_signal(func)
+            if attr_proxy is None:
+                funcs.append(func)
+            else:
+                device_trl, _ = get_device_trl_and_attr(
+                    signal._connector.backend.read_trl
+                )
+                bulk.setdefault(device_trl, []).append((signal, attr_proxy))
+        return await merge_gathered_dicts(
+            [func() for func in funcs]
+            + [_read_attributes(signals) for signals in bulk.values()]
+        )
+
+
+def _get_read_signal(func) -> SignalR | None:
+    """Return the signal read by a read function of StandardReadable, if any."""
+    if isinstance(func, _UncachedRead):
+        return func.signal
+    signal = getattr(func, "__self__", None)
+    if isinstance(signal, SignalR) and signal._cache is None:
+        return signal
+    return None
+
+
+def _get_bulk_readable_signal(
+    func,
+) -> tuple[SignalR | None, AttributeProxy | None]:
+    """
+    Return the signal and its attribute proxy if a read function reads a Tango
+    attribute from the device, otherwise None for both.
+    """
+    signal = _get_read_signal(func)
+    if signal is None:
+        return None, None
+    attr_proxy = _get_attribute_proxy(signal)
+    if attr_proxy is None:
+        return None, None
+    return signal, attr_proxy
+
+
+def _get_attribute_proxy(signal: SignalR) -> AttributeProxy | None:
+    """Return the attribute proxy of a connected Tango signal, if any."""
+    backend = signal._connector.backend
+    if not isinstance(backend, TangoSignalBackend):
+        return None
+    attr_proxy = backend.proxies.get(backend.read_trl)
+    if not isinstance(attr_proxy, AttributeProxy):
+        return None
+    return attr_proxy
+
+
+@ensure_proper_executor
+async def _read_attributes(
+    signals: List[tuple[SignalR, AttributeProxy]],
+) -> dict[str, Reading]:
+    """
+    Read the attributes of several signals of one Tango device in one round-trip.
+    Signals whose attribute cannot be read in bulk are read on their own, so that
+    errors are raised as for a single read.
+    """
+    device_proxy = signals[0][1]._proxy
+    try:
+        attrs = await device_proxy.read_attributes(
+            [attr_proxy._name for _, attr_proxy in signals]
+        )
+    except Exception:
+        attrs = [None] * len(signals)
+
+    readings = {}
+    fallback = []
+    for (signal, attr_proxy), attr in zip(signals, attrs):
+        if attr is None or attr.has_failed:
+            fallback.append(signal.read(cached=False))
+            continue
+        reading = Reading(
+            value=attr_proxy._converter.value(attr.value),
+            timestamp=attr.time.totime(),
+            alarm_severity=attr.quality,
+        )
+        attr_proxy._last_reading = reading
+        readings[signal.name] = reading
+    if fallback:
+        readings.update(await merge_gathered_dicts(fallback))
+    return readings
+
+
+class _Subscriber:
+    """
+    A subscriber of an FSECSubscribable with its own bounded queue of aggregated
+    readings. With the "latest" policy the oldest queued reading is dropped when the
+    queue is full, with the "drop" policy the new reading is dropped.
+    """
+
+    def __init__(
+        self,
+        function: Callback,
+        queue_size: int,
+        policy: str,
+        executor: concurrent.futures.Executor | None,
+    ) -> None:
+        if policy not in ("latest", "drop"):
+            raise ValueError(f"Unknown callback policy '{policy}'")
+        self.function = function
+        self.queue_size = max(queue_size, 1)
+        self.policy = policy
+        self.executor = executor
+        self.queue: collections.deque = collections.deque()
+        self.busy = False
+        self.dropped = 0
+
+    def put(self, readings: dict[str, Reading], loop: asyncio.AbstractEventLoop):
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            if self.policy == "drop":
+                return
+            self.queue.popleft()
+        self.queue.append(readings)
+        if not self.busy:
+            self._dispatch(loop)
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        if self.executor is None:
+            while self.queue:
+                try:
+                    self.function(self.queue.popleft())
+                except Exception as e:
+                    print(f"Error in callback {self.function}: {e}")
+            return
+        # Run one callback at a time on the pool, so that a subscriber sees its
+        # readings in order
+        if not self.queue:
+            self.busy = False
+            return
+        self.busy = True
+        future = loop.run_in_executor(
+            self.executor, self.function, self.queue.popleft()
+        )
+        future.add_done_callback(lambda f: self._done(f, loop))
+
+    def _done(self, future: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error in callback {self.function}: {future.exception()}")
+        self._dispatch(loop)
+
 
 class FSECSubscribable(Subscribable):
+    """
+    Mixin which aggregates the updates of all hinted signals of a device into one
+    callback. Updates arriving within callback_window seconds of the first one are
+    coalesced, and subscribers receive the latest reading of every subscribed signal.
+
+    The dispatch can be tuned per device (class or instance attributes):
+
+    - callback_window: coalescing window in seconds (0 dispatches on the next loop
+      iteration),
+    - callback_queue_size: number of aggregated readings queued per subscriber,
+    - callback_policy: "latest" drops the oldest queued reading when a queue is
+      full, "drop" drops the new one,
+    - callback_workers: threads used for subscribers registered with
+      threaded=True,
+    - history_size: if set, the last history_size readings of every subscribed
+      signal are kept in a SignalHistory, see get_history.
+    """
+
+    callback_window: float = 0.1
+    callback_queue_size: int = 8
+    callback_policy: str = "latest"
+    callback_workers: int = 2
+    history_size: int | None = None
 
     async def connect(
         self,
@@ -33,9 +421,13 @@ class FSECSubscribable(Subscribable):
             mock=mock, timeout=timeout, force_reconnect=force_reconnect
         )
         try:
-            self._callbacks: list[Callback] = []
-            self._processing_callbacks = False
+            self._subscribers: list[_Subscriber] = []
+            self._executor = None
+            self._loop = asyncio.get_running_loop()
+            self._latest_readings: dict[str, Reading] = {}
+            self._flush_handle = None
             self._subscribed_signals = {}
+            self._histories: dict[str, SignalHistory] = {}
             hints = getattr(self, "hints", {})
             fields = hints.get("fields", [])
             for signal_name in fields:
@@ -44,38 +436,98 @@ class FSECSubscribable(Subscribable):
                 for component in parts[1:]:
                     child = getattr(child, component)
                 if hasattr(child, "subscribe"):
+                    if self.history_size:
+                        self._histories[child.name] = SignalHistory(self.history_size)
                     child.subscribe(self._trigger_callbacks)
                     self._subscribed_signals[child.name] = child
         except Exception as e:
             print(f"Error during connection: {e}")
             raise e
 
-    def _trigger_callbacks(self, foo: dict[str, Reading]):
+    def _trigger_callbacks(self, readings: dict[str, Reading]):
+        # Tango events arrive on a Tango thread, polled updates on the event loop
         try:
-            if self._processing_callbacks is True:
-                return
-            self._processing_callbacks = True
-            # If many signals are subscribed, we wait a bit to ensure all signals have been updated
-            time.sleep(0.1)
-            cached_readings = {
-                signal_name: signal._get_cache()._reading
-                for signal_name, signal in self._subscribed_signals.items()
-            }
-            for callback in self._callbacks:
-                callback(cached_readings)
-            self._processing_callbacks = False
-        except Exception as e:
-            self._processing_callbacks = False
-            raise e
-
-    def subscribe(self, function: Callback):
-        if function not in self._callbacks:
-            self._callbacks.append(function)
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._add_readings(readings)
         else:
+            self._loop.call_soon_threadsafe(self._add_readings, readings)
+
+    def _add_readings(self, readings: dict[str, Reading]):
+        self._latest_readings.update(readings)
+        for signal_name, reading in readings.items():
+            if signal_name in self._histories:
+                self._histories[signal_name].append_reading(reading)
+        if self._flush_handle is None and self._subscribers:
+            if self.callback_window > 0:
+                self._flush_handle = self._loop.call_later(
+                    self.callback_window, self._flush
+                )
+            else:
+                self._flush_handle = self._loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        for subscriber in list(self._subscribers):
+            # Every subscriber gets its own copy, it may be handled on a thread
+            subscriber.put(dict(self._latest_readings), self._loop)
+
+    def get_history(self, signal: SignalR | str) -> SignalHistory:
+        """
+        Return the history of a subscribed signal, given as signal or signal name.
+        The history is shared by all users of the device.
+        """
+        signal_name = signal if isinstance(signal, str) else signal.name
+        if signal_name not in getattr(self, "_histories", {}):
+            raise KeyError(
+                f"No history for {signal_name}. Set history_size before connecting"
+                " and use a subscribed (hinted) signal."
+            )
+        return self._histories[signal_name]
+
+    def disconnect(self):
+        """Unsubscribe from all subscribed signals, which stops their polling."""
+        if hasattr(super(), "disconnect"):
+            super().disconnect()
+        for signal in getattr(self, "_subscribed_signals", {}).values():
+            signal.clear_sub(self._trigger_callbacks)
+        self._subscribed_signals = {}
+        if getattr(self, "_flush_handle", None) is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def subscribe(self, function: Callback, threaded: bool = False):
+        """
+        Subscribe to the aggregated readings of the device.
+
+        :param function: Called with a dictionary of the latest reading of every
+            subscribed signal.
+        :param threaded: Call the function on the callback thread pool instead of
+            the event loop. Use this for slow subscribers.
+        """
+        if any(sub.function == function for sub in self._subscribers):
             raise ValueError("Function already subscribed")
+        executor = None
+        if threaded:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.callback_workers, thread_name_prefix=f"{self.name}-callbacks"
+                )
+            executor = self._executor
+        self._subscribers.append(
+            _Subscriber(
+                function, self.callback_queue_size, self.callback_policy, executor
+            )
+        )
 
     def clear_sub(self, function: Callback):
-        if function in self._callbacks:
-            self._callbacks.remove(function)
-        else:
-            raise ValueError("Function not subscribed")
+        for subscriber in self._subscribers:
+            if subscriber.function == function:
+                self._subscribers.remove(subscriber)
+                return
+        raise ValueError("Function not subscribed")
@@ -14,17 +14,23 @@ from bluesky.protocols import (
 )
 
 from .dgg2 import DGG2Timer
+from .gated_flyable import GatedFlyable
 from .sis3820 import SIS3820Counter
 
 
-class GatedArray(StandardReadable, Triggerable):
+class GatedArray(StandardReadable, Triggerable, GatedFlyable):
 
     def __init__(
         self,
         gate: DGG2Timer | str,
         counters: List[StandardReadable | str],
         name: str = "",
+        trigger_mode: str = "auto",
     ) -> None:
+        """
+        trigger_mode is passed to the DGG2Timer created if gate is a TRL, see
+        DGG2Timer.
+        """
 
         with self.add_children_as_readables():
             if all(isinstance(counter, StandardReadable) for counter in counters):
@@ -41,7 +47,7 @@ class GatedArray(StandardReadable, Triggerable):
                 )
 
             if isinstance(gate, str):
-                self.gate = DGG2Timer(gate)
+                self.gate = DGG2Timer(gate, trigger_mode=trigger_mode)
             elif isinstance(gate, DGG2Timer):
                 self.gate = gate
 
@@ -55,13 +61,18 @@ class GatedArray(StandardReadable, Triggerable):
     def __repr__(self):
         return self.name
 
+    def _gated_counters(self) -> List[StandardReadable]:
+        return list(self.counters.values())
+
     @AsyncStatus.wrap
     async def trigger(self) -> None:
-        tasks = []
-        for counter in self.counters.values():
-            if self.reset_on_trigger:
-                tasks.append(counter.Reset.get_value())
-        await asyncio.gather(*tasks)
-
-        trigger_status = self.gate.trigger()
-        await trigger_status
+        # Reset all counters concurrently, overlapped with arming the gate. The gate
+        # is only started once every counter has been reset.
+        if await self.reset_on_trigger.get_value():
+            sample_time, *_ = await asyncio.gather(
+                self.gate.arm(),
+                *(counter.Reset.get_value() for counter in self.counters.values()),
+            )
+        else:
+            sample_time = await self.gate.arm()
+        await self.gate.run_gate(sample_time)
@@ -1,3 +1,6 @@
+import asyncio
+from typing import List
+
 from ophyd_async.core import (
     StandardReadable,
     AsyncStatus,
@@ -10,14 +13,23 @@ from bluesky.protocols import (
 )
 
 from .dgg2 import DGG2Timer
+from .gated_flyable import GatedFlyable
 from .sis3820 import SIS3820Counter
 
 
-class GatedCounter(StandardReadable, Triggerable):
+class GatedCounter(StandardReadable, Triggerable, GatedFlyable):
 
     def __init__(
-        self, gate: DGG2Timer | str, counter: SIS3820Counter | str, name: str = ""
+        self,
+        gate: DGG2Timer | str,
+        counter: SIS3820Counter | str,
+        name: str = "",
+        trigger_mode: str = "auto",
     ) -> None:
+        """
+        trigger_mode is passed to the DGG2Timer created if gate is a TRL, see
+        DGG2Timer.
+        """
 
         with self.add_children_as_readables():
             if isinstance(counter, SIS3820Counter):
@@ -28,7 +40,7 @@ class GatedCounter(StandardReadable, Triggerable):
                 raise ValueError("counter must be a SIS3820Counter or a string")
 
             if isinstance(gate, str):
-                self.gate = DGG2Timer(gate)
+                self.gate = DGG2Timer(gate, trigger_mode=trigger_mode)
             elif isinstance(gate, DGG2Timer):
                 self.gate = gate
             else:
@@ -44,10 +56,16 @@ class GatedCounter(StandardReadable, Triggerable):
     def __repr__(self):
         return self.name
 
+    def _gated_counters(self) -> List[StandardReadable]:
+        return [self.counter]
+
     @AsyncStatus.wrap
     async def trigger(self) -> None:
+        # Reset the counter while the gate is armed, the gate starts afterwards
         if await self.reset_on_trigger.get_value():
-            await self.counter.Reset.get_value()
-
-        trigger_status = self.gate.trigger()
-        await trigger_status
+            sample_time, _ = await asyncio.gather(
+                self.gate.arm(), self.counter.Reset.get_value()
+            )
+        else:
+            sample_time = await self.gate.arm()
+        await self.gate.run_gate(sample_time)
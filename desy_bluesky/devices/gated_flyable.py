@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from abc import abstractmethod
+from typing import Dict, List
+
+import numpy as np
+
+from bluesky.protocols import (
+    EventPageCollectable,
+    Flyable,
+    PartialEventPage,
+    Preparable,
+    Stoppable,
+)
+from event_model import DataKey
+
+from ophyd_async.core import AsyncStatus, StandardReadable
+
+
+class GatedFlyable(Flyable, EventPageCollectable, Preparable, Stoppable):
+    """
+    Mixin which runs a series of gates of a DGG2Timer as one fly scan and collects the
+    counts of every gate as one event page.
+
+    The counts are buffered in NumPy arrays by a collector task, so a point costs one
+    gate and one concurrent read of the counters instead of a full bluesky event. If
+    reset_on_trigger is set, the counters are reset once at kickoff and the counts of
+    a gate are the difference of two consecutive reads.
+
+    The collected data keys are flat, like those of PiLCFlyer, so the stream is
+    declared before collecting:
+
+        yield from bps.prepare(gated_array, 10000, wait=True)
+        yield from bps.declare_stream(gated_array, name="primary", collect=True)
+        yield from bps.kickoff(gated_array, wait=True)
+        yield from bps.complete(gated_array, wait=True)
+        yield from bps.collect(gated_array)
+
+    The class using the mixin provides the gate, reset_on_trigger and _gated_counters.
+    stop() ends the fly scan early: the remaining gates are not run.
+    """
+
+    _fly_points: int = 0
+    _fly_task: asyncio.Task | None = None
+
+    @abstractmethod
+    def _gated_counters(self) -> List[StandardReadable]:
+        """The counters read after every gate."""
+
+    @AsyncStatus.wrap
+    async def prepare(self, value: int) -> None:
+        """Set the number of gates of the next fly scan."""
+        if value < 1:
+            raise ValueError(f"Number of gates must be positive, got {value}")
+        self._fly_points = int(value)
+
+    @AsyncStatus.wrap
+    async def kickoff(self) -> None:
+        if not self._fly_points:
+            raise RuntimeError(f"{self.name} must be prepared with a number of gates")
+        if self._fly_task is not None and not self._fly_task.done():
+            raise RuntimeError(f"{self.name} is already flying")
+        counters = self._gated_counters()
+        reset = await self.reset_on_trigger.get_value()
+        sample_time, *_ = await asyncio.gather(
+            self.gate.arm(),
+            *(counter.Reset.get_value() for counter in counters if reset),
+        )
+        self._fly_data: Dict[str, np.ndarray] = {}
+        self._fly_timestamps: Dict[str, np.ndarray] = {}
+        self._fly_times = np.zeros(self._fly_points)
+        self._fly_collected = 0
+        self._fly_emitted = 0
+        self._fly_task = asyncio.create_task(
+            self._fly(counters, sample_time, self._fly_points, reset)
+        )
+
+    async def _fly(
+        self,
+        counters: List[StandardReadable],
+        sample_time: float,
+        points: int,
+        differences: bool,
+    ) -> None:
+        last = None
+        for i in range(points):
+            await self.gate.run_gate(sample_time)
+            readings = {}
+            for reading in await asyncio.gather(*(c.read() for c in counters)):
+                readings.update(reading)
+            if i == 0:
+                for key, reading in readings.items():
+                    dtype = np.asarray(reading["value"]).dtype
+                    self._fly_data[key] = np.zeros(points, dtype=dtype)
+                    self._fly_timestamps[key] = np.zeros(points)
+            values = {key: reading["value"] for key, reading in readings.items()}
+            for key, reading in readings.items():
+                if differences and last is not None:
+                    self._fly_data[key][i] = values[key] - last[key]
+                else:
+                    self._fly_data[key][i] = values[key]
+                self._fly_timestamps[key][i] = reading["timestamp"]
+            last = values
+            self._fly_times[i] = time.time()
+            self._fly_collected = i + 1
+
+    @AsyncStatus.wrap
+    async def complete(self) -> None:
+        if self._fly_task is None:
+            raise RuntimeError(f"{self.name} has not been kicked off")
+        await self._fly_task
+
+    @AsyncStatus.wrap
+    async def stop(self, success: bool = True) -> None:
+        if self._fly_task is not None and not self._fly_task.done():
+            self._fly_task.cancel()
+        await self.gate.stop()
+
+    async def describe_collect(self) -> Dict[str, DataKey]:
+        data_keys: Dict[str, DataKey] = {}
+        for counter in self._gated_counters():
+            data_keys.update(await counter.describe())
+        return data_keys
+
+    async def collect_pages(self):
+        """Yield the gates collected since the last call as one event page."""
+        if self._fly_task is None:
+            raise RuntimeError(f"{self.name} has not been kicked off")
+        points = slice(self._fly_emitted, self._fly_collected)
+        if points.start == points.stop:
+            return
+        page: PartialEventPage = {
+            "time": self._fly_times[points].tolist(),
+            "data": {key: data[points].tolist() for key, data in self._fly_data.items()},
+            "timestamps": {
+                key: timestamps[points].tolist()
+                for key, timestamps in self._fly_timestamps.items()
+            },
+        }
+        self._fly_emitted = points.stop
+        yield page
@@ -1,30 +1,57 @@
 from __future__ import annotations
 
-from typing import Annotated as A
+from typing import Annotated as A, Dict, List
 
 import asyncio
+import time
 
-from bluesky.protocols import Movable, Stoppable, SyncOrAsync
+from bluesky.protocols import (
+    EventPageCollectable,
+    Flyable,
+    Movable,
+    PartialEventPage,
+    Preparable,
+    Stoppable,
+    SyncOrAsync,
+)
+from event_model import DataKey
 
 from ophyd_async.core import (
     AsyncStatus,
     SignalRW,
     SignalR,
     SignalX,
+    observe_signals_value,
     wait_for_value,
     DEFAULT_TIMEOUT,
     CalculatableTimeout,
     CALCULATE_TIMEOUT,
     StandardReadableFormat as Format,
     Ignore,
+    LazyMock,
 )
 from ophyd_async.tango.core import TangoPolling
 
 
-from .fsec_readable_device import FSECReadableDevice, FSECSubscribable
+from .fsec_readable_device import (
+    FSECReadableDevice,
+    FSECSubscribable,
+    _get_attribute_proxy,
+)
 
 
 class OmsVME58Motor(FSECReadableDevice, Movable, Stoppable):
+    """
+    OmsVME58 motor
+
+    The timeout of a move is computed from the distance, Conversion, SlewRate and
+    Acceleration. The three config values are kept in a snapshot, which is
+    invalidated by writes through set, configure and the fly mode and expires after
+    motion_config_max_age seconds, to pick up writes from other clients. The start
+    position is read before every move, since another client may have moved the
+    motor, unless a polling subscription of Position keeps its last reading current.
+    """
+
     Position: A[SignalRW[float], Format.HINTED_UNCACHED_SIGNAL]
     SlewRate: A[SignalRW[int], Format.CONFIG_SIGNAL]
     SlewRateMax: A[SignalRW[int], Format.CONFIG_SIGNAL]
@@ -39,6 +66,42 @@ class OmsVME58Motor(FSECReadableDevice, Movable, Stoppable):
     UserCalibrate: Ignore
     movevvc: Ignore
 
+    motion_config_max_age: float | None = 60.0
+
+    def __init__(
+        self,
+        trl: str,
+        name: str = "",
+        support_events: bool = False,
+        auto_fill_signals: bool = True,
+    ) -> None:
+        self._motion_config: Dict = {}
+        self._motion_config_time = 0.0
+        super().__init__(
+            trl=trl,
+            support_events=support_events,
+            name=name,
+            auto_fill_signals=auto_fill_signals,
+        )
+
+    async def connect(
+        self,
+        mock: bool | LazyMock = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        force_reconnect: bool = False,
+    ) -> None:
+        await super().connect(
+            mock=mock, timeout=timeout, force_reconnect=force_reconnect
+        )
+        # The server may have been restarted with a different configuration
+        self._invalidate_motion_config()
+
+    def _motion_config_signals(self) -> List[SignalRW]:
+        return [self.Conversion, self.SlewRate, self.Acceleration]
+
+    def _invalidate_motion_config(self) -> None:
+        self._motion_config = {}
+
     @AsyncStatus.wrap
     async def set(
         self,
@@ -46,26 +109,66 @@ class OmsVME58Motor(FSECReadableDevice, Movable, Stoppable):
         timeout: CalculatableTimeout = CALCULATE_TIMEOUT,
     ):
         self._set_success = True
-        (
-            old_position,
-            conversion,
-            velocity,
-            acceleration,
-        ) = await asyncio.gather(
-            self.Position.get_value(),
-            self.Conversion.get_value(),
-            self.SlewRate.get_value(),
-            self.Acceleration.get_value(),
-        )
+        self._mark_active()
         if timeout is CALCULATE_TIMEOUT:
-            assert velocity > 0, "Motor has zero velocity"
-            timeout = (
-                (abs(value - old_position) * conversion / velocity)
-                + (2 * velocity / acceleration)
-                + DEFAULT_TIMEOUT
+            timeout = _move_timeout(value, *await self._motion_parameters())
+        try:
+            await self.Position.set(value, timeout=timeout)
+            await wait_for_value(self.State, "ON", timeout=float(timeout))
+        except Exception:
+            # A failed or timed out move may come from a configuration changed by
+            # another client, so the next move reads it again
+            self._invalidate_motion_config()
+            raise
+
+    async def configure(self, config: Dict) -> tuple[Dict, Dict]:
+        """
+        Write config signals by attribute name, e.g. {"SlewRate": 2000}, and return
+        the old and new configuration readings.
+        """
+        signals = {}
+        for key, value in config.items():
+            signal = getattr(self, key, None)
+            if not isinstance(signal, SignalRW):
+                raise KeyError(f"{self.name} has no writable signal {key}")
+            signals[signal] = value
+        old = await self.read_configuration()
+        try:
+            await asyncio.gather(
+                *(signal.set(value) for signal, value in signals.items())
             )
-        await self.Position.set(value, timeout=timeout)
-        await wait_for_value(self.State, "ON", timeout=float(timeout))
+        finally:
+            self._invalidate_motion_config()
+        return old, await self.read_configuration()
+
+    async def _motion_parameters(self) -> List:
+        """
+        Return position, conversion, slew rate and acceleration. Values which are
+        not in the snapshot are read with one call.
+        """
+        signals = self._motion_config_signals()
+        now = time.time()
+        max_age = self.motion_config_max_age
+        if max_age is not None and now - self._motion_config_time > max_age:
+            self._invalidate_motion_config()
+        config = [self._motion_config.get(signal.name) for signal in signals]
+        position = None
+        proxy = _get_attribute_proxy(self.Position)
+        if proxy is not None and proxy._poll_task and not proxy._poll_task.done():
+            # Only the polling loop of a subscription keeps the last reading current
+            position = proxy._last_reading["value"]
+        if None not in config:
+            if position is None:
+                position = await self.Position.get_value()
+            return [position, *config]
+        values = await self._read_values(self.Position, *signals)
+        if proxy is not None:
+            # mock signals are not cached
+            self._motion_config = {
+                signal.name: value for signal, value in zip(signals, values[1:])
+            }
+            self._motion_config_time = now
+        return values
 
     @AsyncStatus.wrap
     async def stop(self, success: bool = False):
@@ -73,6 +176,112 @@ class OmsVME58Motor(FSECReadableDevice, Movable, Stoppable):
         await self.StopMove.get_value()
 
 
+def _move_timeout(
+    value: float,
+    old_position: float,
+    conversion: float,
+    velocity: int,
+    acceleration: int,
+) -> float:
+    assert velocity > 0, "Motor has zero velocity"
+    return (
+        (abs(value - old_position) * conversion / velocity)
+        + (2 * velocity / acceleration)
+        + DEFAULT_TIMEOUT
+    )
+
+
+class OmsVME58MotorGroup(Movable, Stoppable):
+    """
+    Moves several OmsVME58 motors together, e.g. the axes of a mesh or grid scan.
+
+    The motion parameters of all axes are read concurrently, all moves are started
+    together and a single watcher waits until every State is back to ON. The group
+    works on motors created elsewhere (usually referenced with '#device' in the
+    device list) and does not take them over as children.
+
+        stage = OmsVME58MotorGroup([m1, m2, m3], name="stage")
+        yield from bps.mv(stage, [1.0, 2.0, 0.5])
+        yield from bps.mv(stage, {"m2": 2.5})
+
+    After a move, move_times holds the move time of every axis in seconds and
+    slowest_axis the name of the axis which took longest.
+    """
+
+    def __init__(self, motors: List[OmsVME58Motor], name: str = "") -> None:
+        if not motors:
+            raise ValueError("OmsVME58MotorGroup needs at least one motor")
+        self.motors = list(motors)
+        self.move_times: Dict[str, float] = {}
+        self.slowest_axis: str | None = None
+        self._name = name
+        self.parent = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def __repr__(self):
+        return self.name
+
+    async def connect(self, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> None:
+        """The motors are connected on their own."""
+
+    def _moves(self, value) -> List[tuple[OmsVME58Motor, float]]:
+        if isinstance(value, dict):
+            motors = {motor.name: motor for motor in self.motors}
+            unknown = set(value) - set(motors)
+            if unknown:
+                raise KeyError(f"{self.name} has no motors {sorted(unknown)}")
+            return [(motors[name], target) for name, target in value.items()]
+        if len(value) != len(self.motors):
+            raise ValueError(
+                f"{self.name} needs {len(self.motors)} positions, got {len(value)}"
+            )
+        return list(zip(self.motors, value))
+
+    @AsyncStatus.wrap
+    async def set(self, value, timeout: CalculatableTimeout = CALCULATE_TIMEOUT):
+        """Move to a list of positions (one per motor) or a dict of motor names and
+        positions"""
+        moves = self._moves(value)
+        if timeout is CALCULATE_TIMEOUT:
+            parameters = await asyncio.gather(
+                *(motor._motion_parameters() for motor, _ in moves)
+            )
+            timeouts = [
+                _move_timeout(target, *params)
+                for (_, target), params in zip(moves, parameters)
+            ]
+        else:
+            timeouts = [timeout] * len(moves)
+        for motor, _ in moves:
+            motor._set_success = True
+            motor._mark_active()
+        start = time.monotonic()
+        await asyncio.gather(
+            *(
+                motor.Position.set(target, timeout=move_timeout)
+                for (motor, target), move_timeout in zip(moves, timeouts)
+            )
+        )
+        moving = {motor.State: motor for motor, _ in moves}
+        self.move_times = {}
+        async for state, current in observe_signals_value(
+            *moving, done_timeout=float(max(timeouts))
+        ):
+            if current == "ON" and state in moving:
+                motor = moving.pop(state)
+                self.move_times[motor.name] = time.monotonic() - start
+                if not moving:
+                    break
+        self.slowest_axis = max(self.move_times, key=self.move_times.get)
+
+    @AsyncStatus.wrap
+    async def stop(self, success: bool = False):
+        await asyncio.gather(*(motor.stop(success=success) for motor in self.motors))
+
+
 class OmsVME58MotorNoEncoder(OmsVME58Motor):
     Position: A[SignalRW[float], Format.HINTED_UNCACHED_SIGNAL]
     SlewRate: A[SignalRW[int], Format.CONFIG_SIGNAL]
@@ -85,7 +294,30 @@ class OmsVME58MotorNoEncoder(OmsVME58Motor):
     StepPositionController: A[SignalRW[int], Format.UNCACHED_SIGNAL]
 
 
-class OmsVME58MotorEncoder(OmsVME58Motor):
+class OmsVME58MotorEncoder(
+    OmsVME58Motor, Flyable, EventPageCollectable, Preparable
+):
+    """
+    OmsVME58 motor with encoder. Besides point-to-point moves, the motor can fly
+    from start to stop at a constant velocity while PositionEncoder is streamed:
+
+        yield from bps.prepare(
+            motor, {"start": 0, "stop": 10, "velocity": 0.5}, wait=True
+        )
+        yield from bps.declare_stream(motor, name="primary", collect=True)
+        yield from bps.kickoff(motor, wait=True)
+        yield from bps.complete(motor, wait=True)
+        yield from bps.collect(motor)
+
+    prepare moves to the run-up position before start and sets the slew rate,
+    kickoff starts the move to the run-down position after stop, and a collector
+    task reads PositionEncoder back to back (or every "period" seconds) until the
+    move is done. The samples carry the Tango timestamps of the reads. The data keys
+    are flat, like those of PiLCFlyer, so the stream is declared before collecting.
+    The slew rate is restored at the end of the move, or by stop if the motor is
+    prepared but not flying.
+    """
+
     Position: A[SignalRW[float], Format.HINTED_UNCACHED_SIGNAL]
     SlewRate: A[SignalRW[int], Format.CONFIG_SIGNAL]
     SlewRateMax: A[SignalRW[int], Format.CONFIG_SIGNAL]
@@ -95,6 +327,135 @@ class OmsVME58MotorEncoder(OmsVME58Motor):
     PositionEncoder: A[SignalR[float], Format.UNCACHED_SIGNAL]
     PositionEncoderRaw: A[SignalR[float], Format.UNCACHED_SIGNAL]
 
+    _fly_move: Dict | None = None
+    _fly_task: asyncio.Task | None = None
+    _fly_slew_rate: int | None = None
+
+    @AsyncStatus.wrap
+    async def prepare(self, value: dict) -> None:
+        """
+        Prepare a fly move from value["start"] to value["stop"] with
+        value["velocity"] in user units per second (default: the current slew
+        rate). value["period"] is the time between encoder reads (default 0: as
+        fast as the server answers).
+        """
+        if "start" not in value or "stop" not in value:
+            raise ValueError(f"{self.name} fly move needs a start and a stop")
+        conversion, slew_rate, slew_rate_max, acceleration = await asyncio.gather(
+            self.Conversion.get_value(),
+            self.SlewRate.get_value(),
+            self.SlewRateMax.get_value(),
+            self.Acceleration.get_value(),
+        )
+        if "velocity" in value:
+            fly_slew_rate = int(round(abs(value["velocity"] * conversion)))
+        else:
+            fly_slew_rate = slew_rate
+        if not 0 < fly_slew_rate <= slew_rate_max:
+            raise ValueError(
+                f"{self.name} fly velocity gives slew rate {fly_slew_rate}, "
+                f"must be in 1 - {slew_rate_max}"
+            )
+        start, stop = value["start"], value["stop"]
+        direction = 1 if stop >= start else -1
+        # Distance to reach the slew rate, so that start - stop is flown at
+        # constant velocity
+        run_up = fly_slew_rate**2 / (2 * acceleration) / abs(conversion)
+        if self._fly_slew_rate is None:
+            self._fly_slew_rate = slew_rate
+        await self.set(start - direction * run_up)
+        await self.SlewRate.set(fly_slew_rate)
+        self._invalidate_motion_config()
+        self._fly_move = {
+            "target": stop + direction * run_up,
+            "timeout": (abs(stop - start) + 2 * run_up)
+            * abs(conversion)
+            / fly_slew_rate
+            + 2 * fly_slew_rate / acceleration
+            + DEFAULT_TIMEOUT,
+            "period": value.get("period", 0.0),
+        }
+
+    @AsyncStatus.wrap
+    async def kickoff(self) -> None:
+        if self._fly_move is None:
+            raise RuntimeError(f"{self.name} must be prepared with a fly move")
+        if self._fly_task is not None and not self._fly_task.done():
+            raise RuntimeError(f"{self.name} is already flying")
+        self._fly_timestamps: List[float] = []
+        self._fly_positions: List[float] = []
+        self._fly_emitted = 0
+        self._set_success = True
+        self._mark_active()
+        await self.Position.set(self._fly_move["target"])
+        self._fly_task = asyncio.create_task(
+            self._fly(self._fly_move["timeout"], self._fly_move["period"])
+        )
+
+    async def _wait_for_move(self, timeout: float) -> None:
+        # The State may still show ON right after the Position write
+        await wait_for_value(self.State, lambda state: state != "ON", DEFAULT_TIMEOUT)
+        await wait_for_value(self.State, "ON", timeout=timeout)
+
+    async def _fly(self, timeout: float, period: float) -> None:
+        move_done = asyncio.ensure_future(self._wait_for_move(timeout))
+        try:
+            while not move_done.done():
+                reading = await self.PositionEncoder.read(cached=False)
+                reading = reading[self.PositionEncoder.name]
+                self._fly_timestamps.append(reading["timestamp"])
+                self._fly_positions.append(reading["value"])
+                await asyncio.sleep(period)
+            await move_done
+        finally:
+            move_done.cancel()
+            await self._restore_slew_rate()
+
+    async def _restore_slew_rate(self) -> None:
+        if self._fly_slew_rate is not None:
+            await self.SlewRate.set(self._fly_slew_rate)
+            self._fly_slew_rate = None
+            self._invalidate_motion_config()
+
+    @AsyncStatus.wrap
+    async def complete(self) -> None:
+        if self._fly_task is None:
+            raise RuntimeError(f"{self.name} has not been kicked off")
+        try:
+            await self._fly_task
+        finally:
+            self._fly_move = None
+        if not self._set_success:
+            raise RuntimeError(f"{self.name} fly move was stopped")
+
+    @AsyncStatus.wrap
+    async def stop(self, success: bool = False):
+        self._set_success = success
+        await self.StopMove.get_value()
+        # A running fly move ends with the State and restores the slew rate itself
+        if self._fly_task is None or self._fly_task.done():
+            await self._restore_slew_rate()
+
+    async def describe_collect(self) -> Dict[str, DataKey]:
+        return await self.PositionEncoder.describe()
+
+    async def collect_pages(self):
+        """Yield the encoder samples taken since the last call as one event page."""
+        if self._fly_task is None:
+            raise RuntimeError(f"{self.name} has not been kicked off")
+        timestamps = self._fly_timestamps[self._fly_emitted:]
+        if not timestamps:
+            return
+        positions = self._fly_positions[self._fly_emitted:]
+        self._fly_emitted += len(timestamps)
+        key = self.PositionEncoder.name
+        page: PartialEventPage = {
+            "time": timestamps,
+            "data": {key: positions},
+            "timestamps": {key: timestamps},
+        }
+        yield page
+
 
 class PolledOmsVME58MotorEncoder(FSECSubscribable, OmsVME58Motor):
     Position: A[SignalRW[float], Format.HINTED_SIGNAL, TangoPolling(0.1, 0.1)]
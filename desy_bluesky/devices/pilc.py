@@ -1,9 +1,17 @@
+import json
 from abc import abstractmethod
 from typing import Optional, TypeVar
 from ophyd_async.core import SignalR, SignalRW, Device, DeviceVector, StandardReadable
-from ophyd_async.tango.core import tango_signal_rw, tango_signal_r, TangoDevice
+from ophyd_async.tango.core import (
+    tango_signal_rw,
+    tango_signal_r,
+    TangoDevice,
+    TangoSignalBackend,
+)
 from bluesky.protocols import Readable, Stoppable, Movable
 
+from .attribute_cache import get_attribute_list, get_cached_value, set_cached_value
+
 T = TypeVar("T")
 
 
@@ -26,6 +34,12 @@ class PiLCPort(Readable, Device):
 
     type: str = None
 
+    # DeviceProxy of the PiLC and the configuration signals of the port with their
+    # Tango attribute names, set by PiLC.register_signals. They allow reading and
+    # writing the whole configuration with one Tango call.
+    proxy = None
+    config_attributes: dict = {}
+
     @abstractmethod
     def __init__(self): ...
 
@@ -145,6 +159,10 @@ class PiLCIO(PiLCPort):
         return await self.status.set(value)
 
     async def read_configuration(self):
+        if self.proxy is not None and self.config_attributes:
+            return await read_config_attributes(
+                self.proxy, self.config_attributes.values()
+            )
         pre = {}
         if self.type == "IOt":
             pre |= await self.resistor.read()
@@ -178,6 +196,11 @@ class PiLCIO(PiLCPort):
         the functions of these configurable values is the same as defined in the docstring of PiLCIO
         """
         old = await self.read_configuration()
+        if self.proxy is not None and self.config_attributes:
+            await write_config_attributes(
+                self.proxy, self.config_attributes, config
+            )
+            return (old, await self.read_configuration())
         if "direction" in config:
             await self.direction.set(config["direction"])
         if "resistor" in config and self.resistor:
@@ -202,6 +225,68 @@ class PiLCIO(PiLCPort):
         return (old, new)
 
 
+# Configuration values which are read with the configuration but not written by
+# configure. The IO status is only settable in manual mode (operation = 0), so writing
+# back a saved configuration must not touch it.
+READ_ONLY_CONFIG = {"status"}
+
+
+def _tango_converter(signal):
+    """return the converter of a connected Tango signal, or None"""
+    backend = signal._connector.backend
+    if isinstance(backend, TangoSignalBackend):
+        return getattr(backend, "converter", None)
+    return None
+
+
+def _from_tango(signal, value):
+    """convert a raw Tango value as the signal does, e.g. to the value of
+    signal.get_value() for enums and DevState"""
+    converter = _tango_converter(signal)
+    return value if converter is None else converter.value(value)
+
+
+def _to_tango(signal, value):
+    """convert a value to the raw Tango value written by signal.set"""
+    converter = _tango_converter(signal)
+    return value if converter is None else converter.write_value(value)
+
+
+async def read_config_attributes(proxy, signals) -> dict:
+    """Read the Tango attributes of (signal, attribute name) pairs in one call and
+    return them as readings keyed by the signal names"""
+    signals = list(signals)
+    attrs = await proxy.read_attributes([attr_name for _, attr_name in signals])
+    return {
+        signal.name: {
+            "value": _from_tango(signal, attr.value),
+            "timestamp": attr.time.totime(),
+            "alarm_severity": int(attr.quality),
+        }
+        for (signal, _), attr in zip(signals, attrs)
+    }
+
+
+def config_write_values(config_attributes: dict, config: dict) -> list:
+    """(tango attribute name, raw value) of the values of config whose keys are in
+    config_attributes. Keys not known to the port and read-only keys are ignored,
+    like in PiLCIO.configure"""
+    values = []
+    for key, value in config.items():
+        if key in config_attributes and key not in READ_ONLY_CONFIG:
+            signal, attr_name = config_attributes[key]
+            values.append((attr_name, _to_tango(signal, value)))
+    return values
+
+
+async def write_config_attributes(proxy, config_attributes: dict, config: dict):
+    """Write the values of config whose keys are in config_attributes with one Tango
+    call, see config_write_values"""
+    values = config_write_values(config_attributes, config)
+    if values:
+        await proxy.write_attributes(values)
+
+
 class PiLCReadable(PiLCPort):
     """
     A class for a PiLCPort that is read only
@@ -240,6 +325,114 @@ class PiLCMovable(PiLCReadable, Movable, Stoppable):
         return self.value.set(self.stopValue)
 
 
+# --------------------------------------------------------------------
+IO_PROPERTIES = [
+    "DIR",
+    "Status",
+    "Operation",
+    "Connect",
+    "Invers",
+    "DOP",
+    "Time",
+    "CTR_En",
+    "CTR_RST",
+    "CTR_VAL",
+]
+
+
+def port_map_entry(module: str, kind: str, num: int) -> dict:
+    """Return the port map entry of a port
+
+    module:
+        The tango prefix of the module (eg. "ADC", "IO")
+    kind:
+        "readable", "movable" or the flavour of an IO port: "IOt" (TTL),
+        "IOnt" (NIM TTL) or "VIO" (virtual)
+    """
+    if kind in ["readable", "movable"]:
+        attributes = [f"{module}_{num}"]
+    else:
+        attributes = [f"{module}_{prop}_{num}" for prop in IO_PROPERTIES]
+        if kind == "IOt":
+            attributes.append(f"IO_Resistor_{num}")
+        elif kind == "IOnt":
+            attributes.append(f"IO_Level_{num}")
+    return {"module": module, "kind": kind, "attributes": attributes}
+
+
+def _io_flavour(num: int, attributes: set) -> str:
+    # TTL has a resistor attribute, NIM TTL has a level attribute,
+    # virtual has none of these attributes
+    if f"IO_Resistor_{num}" in attributes:
+        return "IOt"
+    if f"IO_Level_{num}" in attributes:
+        return "IOnt"
+    return "VIO"
+
+
+def discover_port_map(
+    attributes: set,
+    readable_module_types: list,
+    movable_module_types: list,
+    port_config: Optional[dict] = None,
+) -> dict:
+    """Build the port map of a PiLC from its attribute names
+
+    The port map is a JSON serialisable dict with the port numbers as keys and
+    port_map_entry dicts as values. With port_config only the configured ports are
+    mapped, otherwise ports 1 - 16 are discovered.
+    """
+    port_map = {}
+    if port_config is not None:
+        for num, module in port_config.items():
+            if module in readable_module_types:
+                port_map[num] = port_map_entry(module, "readable", num)
+            elif module in movable_module_types:
+                port_map[num] = port_map_entry(module, "movable", num)
+            elif module in ["IO", "VIO"]:
+                port_map[num] = port_map_entry(
+                    module, _io_flavour(num, attributes), num
+                )
+            else:
+                # the module is not known or misspelled
+                print(f"unknown module: '{module}'")
+        return port_map
+
+    for num in range(1, 17):
+        for module in readable_module_types:
+            if f"{module}_{num}" in attributes:
+                port_map[num] = port_map_entry(module, "readable", num)
+                break
+        else:
+            for module in movable_module_types:
+                if f"{module}_{num}" in attributes:
+                    port_map[num] = port_map_entry(module, "movable", num)
+                    break
+            else:
+                for module in ["IO", "VIO"]:
+                    if f"{module}_DIR_{num}" in attributes:
+                        port_map[num] = port_map_entry(
+                            module, _io_flavour(num, attributes), num
+                        )
+                        break
+    return port_map
+
+
+def _port_map_from_json(port_map: Optional[dict]) -> Optional[dict]:
+    # JSON turns the port numbers into strings
+    if port_map is None:
+        return None
+    return {int(num): entry for num, entry in port_map.items()}
+
+
+def validate_port_map(port_map: dict, attributes: set) -> list:
+    """Return the attributes needed by the port map which the device does not have"""
+    return sorted(
+        {name for entry in port_map.values() for name in entry["attributes"]}
+        - attributes
+    )
+
+
 # --------------------------------------------------------------------
 class PiLC(TangoDevice, StandardReadable):
     """
@@ -253,7 +446,8 @@ class PiLC(TangoDevice, StandardReadable):
         not exist, as some cards require more than 1 port
     aliases:
         A dict containing the current aliases to ports. see the aliases
-        parameter of __init__'s docstring for more info
+        parameter of __init__'s docstring for more info. Aliases for the . syntax
+        are resolved when connecting, the [] syntax always uses the current dict
     trl:
         The tango address of the PiLC (created in __init__)
     readablemodules, movablemodules, portconfig:
@@ -282,6 +476,7 @@ class PiLC(TangoDevice, StandardReadable):
         readable_module_types: Optional[list] = None,
         movable_module_types: Optional[list] = None,
         aliases: Optional[dict] = None,
+        port_map: Optional[dict | str] = None,
     ) -> None:
         """
         Arguments:
@@ -308,6 +503,12 @@ class PiLC(TangoDevice, StandardReadable):
             and pilc.led or pilc["led"] -> pilc.ports[11].
             Note: the name does not change in bluesky, so reading from pilc.led will not result
             in a column for pilc-led but instead for pilc-led_11
+        port_map:
+            A port map as saved with PiLC.save_port_map, or the path of the file. It
+            is validated against the attributes of the device on connect and
+            replaces the discovery of the ports. If it does not match the device,
+            the ports are discovered again. Without port_map, a port map stored in
+            the active attribute cache is used in the same way.
         """
         self.trl = trl
 
@@ -317,6 +518,10 @@ class PiLC(TangoDevice, StandardReadable):
         self.readable_module_types = readable_module_types or ["ADC", "Temp"]
         self.movable_module_types = movable_module_types or ["DAC"]
         self.aliases = aliases or {}
+        if isinstance(port_map, str):
+            with open(port_map, "r") as f:
+                port_map = json.load(f)
+        self.port_map = _port_map_from_json(port_map) if port_map else None
 
         TangoDevice.__init__(self, trl, name=name)
 
@@ -399,17 +604,9 @@ class PiLC(TangoDevice, StandardReadable):
         self._movable: list = [self.clk1, self.clk2, self.clk3, self.clk4]
         self._readable: list = []
 
-        # attrlist probably won't change while in the for loop. save it outside for
-        # performance
-        attrlist = self.proxy.get_attribute_list()
-
-        def has_port(port_type: list, num: int, port_list: list, check: str = ""):
-            """returns the type name of the port found, if none was found, return
-            false"""
-            for port_name in port_type:
-                if f"{port_name}_{check}{num}" in port_list:
-                    return port_name
-            return False
+        # The attribute list is taken from the attribute cache if one is active
+        attrlist = set(get_attribute_list(self.proxy, self.trl))
+        self.port_map = self._get_port_map(attrlist)
 
         def create_readable(prefix: str, num: int):
             """create a readable port where the tango trl is in the style of
@@ -427,26 +624,20 @@ class PiLC(TangoDevice, StandardReadable):
             self.ports[num] = mod
             self._readable += [mod.value]
 
-        def create_io(prefix: str, num: int):
+        def create_io(prefix: str, num: int, flavour: str):
             """create an io port where the tango trl is in the style of
             {prefix}_{property}_{num} (property is not changable outside of function)"""
             io = PiLCIO()
 
             io.direction = self._register_signal_rw(bool, prefix, num, "DIR")
 
-            # Decypher between TTL, NIM TTL, and VIO
-            # TTL has a resistor attribute, NIM TTL has a level attribute,
-            # virtual has none of these attributes
-            if f"IO_Resistor_{str(num)}" in attrlist:
+            io.type = flavour
+            if flavour == "IOt":
                 # The module is a TTL card. Resistor is configurable
-                io.type = "IOt"
                 io.resistor = self._register_signal_rw(int, "IO", num, "Resistor")
-            elif f"IO_Level_{str(num)}" in attrlist:
+            elif flavour == "IOnt":
                 # The module is a NIM TTL card. Level is configurable
-                io.type = "IOnt"
                 io.level = self._register_signal_rw(int, "IO", num, "Level")
-            else:
-                io.type = "VIO"
 
             io.status = self._register_signal_rw(int, prefix, num, "Status")
             io.operation = self._register_signal_rw(int, prefix, num, "Operation")
@@ -458,6 +649,23 @@ class PiLC(TangoDevice, StandardReadable):
             io.counter_reset = self._register_signal_rw(bool, prefix, num, "CTR_RST")
             io.counter_value = self._register_signal_r(int, prefix, num, "CTR_VAL")
 
+            # Tango attribute names of the configuration, for bulk reads and writes
+            io.proxy = self.proxy
+            io.config_attributes = {
+                "direction": (io.direction, f"{prefix}_DIR_{num}"),
+                "status": (io.status, f"{prefix}_Status_{num}"),
+                "operation": (io.operation, f"{prefix}_Operation_{num}"),
+                "connections": (io.connections, f"{prefix}_Connect_{num}"),
+                "invers": (io.invers, f"{prefix}_Invers_{num}"),
+                "dop": (io.dop, f"{prefix}_DOP_{num}"),
+                "time": (io.time, f"{prefix}_Time_{num}"),
+                "counter_enable": (io.counter_enable, f"{prefix}_CTR_En_{num}"),
+            }
+            if io.resistor is not None:
+                io.config_attributes["resistor"] = (io.resistor, f"IO_Resistor_{num}")
+            if io.level is not None:
+                io.config_attributes["level"] = (io.level, f"IO_Level_{num}")
+
             # add io to ports
             self.ports[num] = io
 
@@ -481,53 +689,126 @@ class PiLC(TangoDevice, StandardReadable):
 
             self._readable += [io.counter_value]
 
-        if self.port_config is not None:
-            for key in self.port_config:
-                if self.port_config[key] in self.readable_module_types:
-                    create_readable(self.port_config[key], key)
-                elif self.port_config[key] in self.movable_module_types:
-                    create_movable(self.port_config[key], key)
-                elif self.port_config[key] in ["IO", "VIO"]:
-                    create_io(self.port_config[key], key)
-                else:
-                    # the module is not known or misspelled
-                    print(f"unknown module: '{self.port_config[key]}'")
-                # add name for module if it exists
-                if key in self.ports and hasattr(self.ports[key], "name"):
-                    self.ports[key].port_name = self._register_signal_rw(
-                        str, "Name", key
-                    )
-                    self._movable.append(self.ports[key].port_name)
-        else:
-            for i in range(1, 17):
-                readable_name = has_port(self.readable_module_types, i, attrlist)
-                movable_name = has_port(self.movable_module_types, i, attrlist)
-                io_name = has_port(["IO", "VIO"], i, attrlist, "DIR_")
-                if readable_name:
-                    create_readable(readable_name, i)
-                elif movable_name:
-                    create_movable(movable_name, i)
-                elif io_name:
-                    create_io(io_name, i)
-                # else:
-                #     print(f"nonexistant port {i}, or in use by another module")
-                # add name for module if it exists
-                if i in self.ports and hasattr(self.ports[i], "name"):
-                    self.ports[i].port_name = self._register_signal_rw(str, "Name", i)
-                    self._movable.append(self.ports[i].port_name)
+        for num, entry in self.port_map.items():
+            if entry["kind"] == "readable":
+                create_readable(entry["module"], num)
+            elif entry["kind"] == "movable":
+                create_movable(entry["module"], num)
+            else:
+                create_io(entry["module"], num, entry["kind"])
+            # add name for module if it exists
+            if num in self.ports and hasattr(self.ports[num], "name"):
+                self.ports[num].port_name = self._register_signal_rw(str, "Name", num)
+                self._movable.append(self.ports[num].port_name)
+                self._add_port_name_attribute(num)
+
+        # alias table for the . syntax, looked up by __getattr__
+        self._alias_ports = {
+            alias: self.ports[num]
+            for alias, num in self.aliases.items()
+            if num in self.ports
+        }
 
         # register all signals
         self.set_readable_signals(read=self._readable, config=self._movable)
         self.set_name(self.name)
 
+    def _get_port_map(self, attrlist: set) -> dict:
+        """return the given or cached port map if it matches the attributes of the
+        device, otherwise discover the ports"""
+        # the discovery depends on the port config and module types
+        cache_key = "pilc_port_map " + json.dumps(
+            [self.port_config, self.readable_module_types, self.movable_module_types],
+            sort_keys=True,
+        )
+        port_map = self.port_map
+        if port_map is None:
+            port_map = _port_map_from_json(
+                get_cached_value(self.trl, cache_key)
+            )
+        if port_map:
+            missing = validate_port_map(port_map, attrlist)
+            if not missing:
+                return port_map
+            print(
+                f"Warning: port map of {self.trl} does not match the device"
+                f" (missing {', '.join(missing[:5])}), discovering the ports"
+            )
+        port_map = discover_port_map(
+            attrlist,
+            self.readable_module_types,
+            self.movable_module_types,
+            self.port_config,
+        )
+        set_cached_value(self.trl, cache_key, port_map)
+        return port_map
+
+    def save_port_map(self, path: str) -> None:
+        """save the port map of the connected PiLC as JSON, to be passed as port_map"""
+        with open(path, "w") as f:
+            json.dump(self.port_map, f, indent=1)
+
+    def _add_port_name_attribute(self, num: int) -> None:
+        """add the name of an IO port to its bulk configuration"""
+        port = self.ports[num]
+        if port.config_attributes:
+            port.config_attributes["name"] = (port.port_name, f"Name_{num}")
+
+    def _config_attributes(self) -> list:
+        """(signal, tango attribute name) of every configuration value of the PiLC"""
+        attributes = [
+            (getattr(self, f"clk{i}"), f"Clk_{i}") for i in range(1, 5)
+        ]
+        for num, port in self.ports.items():
+            if port.config_attributes:
+                attributes += port.config_attributes.values()
+            elif port.port_name is not None:
+                attributes.append((port.port_name, f"Name_{num}"))
+        return attributes
+
+    async def read_configuration(self):
+        """read the configuration of the PiLC: clocks, and names and IO settings of
+        all ports, with one Tango call"""
+        return await read_config_attributes(self.proxy, self._config_attributes())
+
+    async def configure(self, config: dict):
+        """configure several ports and the clocks with one Tango call
+        config is a dict with the port numbers as keys and the config dicts of
+        PiLCIO.configure as values. The clocks are set with the keys "clk1" - "clk4":
+            {"clk1": 1000.0, 3: {"direction": True, "operation": 3, "connections": 1}}
+        returns the configuration before and after writing as (old, new)
+        """
+        values = []
+        for key, value in config.items():
+            if isinstance(key, str) and key.startswith("clk"):
+                clock = getattr(self, key)
+                values.append((f"Clk_{key[3:]}", _to_tango(clock, value)))
+                continue
+            port = self.ports[key]
+            config_attributes = port.config_attributes
+            if not config_attributes:
+                # Only the name of other ports is configurable
+                unknown = set(value) - {"name"}
+                if unknown or port.port_name is None:
+                    raise ValueError(
+                        f"port {key} is not an IO port, {sorted(unknown or value)}"
+                        " cannot be configured"
+                    )
+                config_attributes = {"name": (port.port_name, f"Name_{key}")}
+            values += config_write_values(config_attributes, value)
+        old = await self.read_configuration()
+        if values:
+            await self.proxy.write_attributes(values)
+        return (old, await self.read_configuration())
+
     def __getitem__(self, name: str):
         """function to make aliases work with the [] syntax"""
         return self.ports[self.aliases[name]]
 
-    def __getattribute__(self, name: str):
-        """function to make aliases work with the . syntax, while keeping other
-        values intact"""
-        try:
-            return object.__getattribute__(self, name)
-        except AttributeError:
-            return self.__getitem__(name)
+    def __getattr__(self, name: str):
+        """function to make aliases work with the . syntax. It is only called for
+        names which are not found otherwise, so other attributes are not slowed down"""
+        alias_ports = self.__dict__.get("_alias_ports", {})
+        if name in alias_ports:
+            return alias_ports[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
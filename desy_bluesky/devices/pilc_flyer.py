@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from bluesky.protocols import (
+    EventPageCollectable,
+    Flyable,
+    PartialEventPage,
+    Preparable,
+    Readable,
+    Stoppable,
+)
+from event_model import DataKey
+
+from ophyd_async.core import DEFAULT_TIMEOUT, AsyncStatus
+
+from .pilc import PiLC, PiLCIO
+
+
+class PiLCFlyer(Flyable, EventPageCollectable, Preparable, Stoppable):
+    """
+    Fly scan driven by a PiLC clock output.
+
+    The flyer drives devices created elsewhere (usually referenced with '#device' in
+    the device list) and does not take them over as children.
+
+    One IO port of the PiLC is configured as clock output and triggers the detectors.
+    The triggers are counted on a second IO port, which is wired to the clock output
+    (or to the detector trigger line). While flying, a collector task samples the
+    trigger counter together with the encoders, so every row of the collected stream
+    holds the number of triggers sent so far and the encoder readings at that time.
+
+    The PiLC has no counter compare to stop the clock after a number of triggers, so
+    the clock is stopped in software once the counter reaches points. Near the end the
+    collector sleeps only until the expected last trigger, so the clock overshoots by
+    the time of one counter read and one write (about frequency * Tango round-trip
+    triggers, usually a few) instead of a poll period. The counter is read once more
+    after the clock is stopped, so the last sample holds the number of triggers
+    actually sent. positions_at_triggers returns at most points positions.
+
+    The collected data keys are flat, so the stream is declared before collecting:
+
+        yield from bps.prepare(flyer, {"frequency": 1000, "points": 50000}, wait=True)
+        yield from bps.declare_stream(flyer, name="primary", collect=True)
+        yield from bps.kickoff(flyer, wait=True)
+        yield from bps.abs_set(motor, 10)   # move while the clock is running
+        yield from bps.complete(flyer, wait=True)
+        yield from bps.collect(flyer)
+
+    Arguments:
+    ----------
+
+    pilc:
+        The PiLC providing the clock and the counter
+    trigger_port:
+        IO port configured as clock output
+    counter_port:
+        IO port counting the triggers
+    clock:
+        Clock (1 - 4) driving the trigger port
+    encoders:
+        Readables sampled with the trigger counter, e.g. motor encoders
+    poll_period:
+        Period in seconds in which the counter and the encoders are sampled
+    """
+
+    def __init__(
+        self,
+        pilc: PiLC,
+        trigger_port: int,
+        counter_port: int,
+        clock: int = 1,
+        encoders: List[Readable] | None = None,
+        poll_period: float = 0.01,
+        name: str = "",
+    ) -> None:
+        if clock not in (1, 2, 3, 4):
+            raise ValueError(f"PiLC clock must be 1 - 4, got {clock}")
+        self.pilc = pilc
+        self.trigger_port = trigger_port
+        self.counter_port = counter_port
+        self.clock = clock
+        self.encoders = encoders or []
+        self.poll_period = poll_period
+        self._frequency = None
+        self._points = None
+        self._fly_task: asyncio.Task | None = None
+        self._rows: List[Dict] = []
+        self._emitted = 0
+        self._name = name
+        self.parent = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def __repr__(self):
+        return self.name
+
+    async def connect(self, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> None:
+        """The PiLC and the encoders are connected on their own."""
+
+    def _io(self, port: int) -> PiLCIO:
+        io = self.pilc.ports[port]
+        if not isinstance(io, PiLCIO):
+            raise ValueError(f"PiLC port {port} is not an IO port")
+        return io
+
+    @AsyncStatus.wrap
+    async def prepare(self, value: dict) -> None:
+        """
+        Set the trigger frequency (written to the clock of the PiLC) and, optionally,
+        the number of triggers after which the fly scan completes. Without points the
+        fly scan runs until stop() is called.
+        """
+        if "frequency" not in value:
+            raise ValueError("PiLCFlyer.prepare needs a frequency")
+        self._frequency = value["frequency"]
+        self._points = value.get("points")
+        clock = getattr(self.pilc, f"clk{self.clock}")
+        await asyncio.gather(
+            clock.set(self._frequency),
+            # Counter port: input, counting rising edges
+            self._io(self.counter_port).configure(
+                {"direction": False, "operation": 0, "counter_enable": False}
+            ),
+            # Trigger port: output, held low until kickoff
+            self._io(self.trigger_port).configure(
+                {"direction": True, "operation": 0, "connections": self.clock}
+            ),
+        )
+
+    @AsyncStatus.wrap
+    async def kickoff(self) -> None:
+        if self._frequency is None:
+            raise RuntimeError(f"{self.name} must be prepared with a frequency")
+        if self._fly_task is not None and not self._fly_task.done():
+            raise RuntimeError(f"{self.name} is already flying")
+        counter = self._io(self.counter_port)
+        # CTR_RST is level sensitive: pulse it, or the counter stays held in reset
+        await counter.counter_reset.set(True)
+        await counter.counter_reset.set(False)
+        await counter.counter_enable.set(True)
+        self._rows = []
+        self._emitted = 0
+        # Start the clock output last, so that the first trigger is counted
+        await self._io(self.trigger_port).operation.set(3)
+        self._fly_task = asyncio.create_task(self._sample(counter))
+
+    async def _sample(self, counter: PiLCIO) -> None:
+        while True:
+            count = await self._take_sample(counter)
+            if self._points is None:
+                await asyncio.sleep(self.poll_period)
+            elif count >= self._points:
+                await self._stop_clock()
+                await self._take_sample(counter)
+                return
+            else:
+                remaining = (self._points - count) / self._frequency
+                await asyncio.sleep(min(self.poll_period, remaining))
+
+    async def _take_sample(self, counter: PiLCIO) -> int:
+        """Read the trigger counter and the encoders into a new row."""
+        count, *readings = await asyncio.gather(
+            counter.counter_value.get_value(),
+            *(encoder.read() for encoder in self.encoders),
+        )
+        row = {"time": time.time(), "trigger_index": int(count), "readings": {}}
+        for reading in readings:
+            row["readings"].update(reading)
+        self._rows.append(row)
+        return row["trigger_index"]
+
+    async def _stop_clock(self) -> None:
+        trigger = self._io(self.trigger_port)
+        await trigger.operation.set(0)
+        await trigger.status.set(0)
+
+    @AsyncStatus.wrap
+    async def complete(self) -> None:
+        if self._fly_task is None:
+            raise RuntimeError(f"{self.name} has not been kicked off")
+        await self._fly_task
+
+    @AsyncStatus.wrap
+    async def stop(self, success: bool = True) -> None:
+        if self._fly_task is not None and not self._fly_task.done():
+            self._fly_task.cancel()
+        await self._stop_clock()
+
+    def positions_at_triggers(self, key: str) -> np.ndarray:
+        """
+        Return the value of a sampled reading (e.g. an encoder position) at every
+        trigger sent so far, linearly interpolated between the samples. The triggers
+        sent after points are left out. Empty if no trigger was counted yet.
+        """
+        if not self._rows:
+            return np.empty(0)
+        triggers = self._rows[-1]["trigger_index"]
+        if self._points is not None:
+            triggers = min(triggers, self._points)
+        if triggers < 1:
+            return np.empty(0)
+        indices = np.array([row["trigger_index"] for row in self._rows])
+        values = np.array([row["readings"][key]["value"] for row in self._rows])
+        return np.interp(np.arange(1, triggers + 1), indices, values)
+
+    async def describe_collect(self) -> Dict[str, DataKey]:
+        data_keys: Dict[str, DataKey] = {
+            f"{self.name}-trigger_index": {
+                "source": self.pilc.trl,
+                "dtype": "integer",
+                "shape": [],
+            }
+        }
+        for encoder in self.encoders:
+            data_keys.update(await encoder.describe())
+        return data_keys
+
+    async def collect_pages(self):
+        """Yield the samples taken since the last call as one event page."""
+        rows = self._rows[self._emitted:]
+        if not rows:
+            return
+        self._emitted += len(rows)
+        index_key = f"{self.name}-trigger_index"
+        times = [row["time"] for row in rows]
+        page: PartialEventPage = {
+            "time": times,
+            "data": {index_key: [row["trigger_index"] for row in rows]},
+            "timestamps": {index_key: times},
+        }
+        for key in rows[0]["readings"]:
+            page["data"][key] = [row["readings"][key]["value"] for row in rows]
+            page["timestamps"][key] = [
+                row["readings"][key]["timestamp"] for row in rows
+            ]
+        yield page
@@ -0,0 +1,213 @@
+"""
+Adaptive polling of TangoPolling-annotated signals.
+
+The polling period in a TangoPolling annotation is the period used while the device is
+active. A PollingPolicy backs the period off exponentially, up to idle_period, while
+none of the polled attributes of the device changes its value, and returns to the
+annotated period as soon as one does. A device is also active while a polled attribute
+is in one of active_states (e.g. State MOVING), and when the device marks itself
+active at the start of a move or an acquisition.
+
+The engine only looks at the readings the polling already produced, so it does not add
+any Tango traffic. The policy is set per device in the YAML device list:
+
+    motor1:
+      driver: desy_bluesky.devices.PolledOmsVME58MotorEncoder
+      uri: tango://host:10000/p09/motor/exp.01
+      kwargs:
+        polling:
+          idle_period: 5.0
+          backoff: 2.0
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+import ophyd_async
+from ophyd_async.core import Device
+from ophyd_async.tango.core import AttributeProxy, TangoSignalBackend
+
+
+class PollingPolicy:
+    """
+    Parameters of the adaptive polling of one device.
+
+    :param fast_period: Polling period while the device is active. Defaults to the
+        period of the TangoPolling annotation of each signal.
+    :param idle_period: Longest polling period while the device is idle.
+    :param backoff: Factor by which the period grows per idle check.
+    :param active_states: Values of polled attributes which keep the device active.
+    """
+
+    def __init__(
+        self,
+        fast_period: float | None = None,
+        idle_period: float = 2.0,
+        backoff: float = 2.0,
+        active_states: Iterable[str] = ("MOVING", "RUNNING"),
+    ) -> None:
+        if backoff < 1.0:
+            raise ValueError(f"Polling backoff must be at least 1, got {backoff}")
+        self.fast_period = fast_period
+        self.idle_period = idle_period
+        self.backoff = backoff
+        self.active_states = set(active_states)
+
+
+class _PolledAttribute:
+    """
+    A polled Tango attribute of a device. The period is set with the public
+    AttributeProxy.set_polling. ophyd-async has no public API for the other
+    polling state (the annotated parameters, the last polled reading and the poll
+    loop), so all access to AttributeProxy internals is kept in this class and
+    only used with the ophyd-async versions in _PRIVATE_API_VERSIONS.
+    """
+
+    def __init__(self, proxy: AttributeProxy, fast_period: float | None) -> None:
+        self.proxy = proxy
+        self.fast = fast_period or proxy._polling_period
+        self._abs_change = proxy._abs_change
+        self._rel_change = proxy._rel_change
+
+    @classmethod
+    def of(cls, signal: Device, fast_period: float | None) -> _PolledAttribute | None:
+        """Return the polled attribute read by a signal, if polling is allowed."""
+        backend = getattr(signal._connector, "backend", None)
+        if not isinstance(backend, TangoSignalBackend):
+            return None
+        proxy = backend.proxies.get(backend.read_trl)
+        if isinstance(proxy, AttributeProxy) and proxy._allow_polling:
+            return cls(proxy, fast_period)
+        return None
+
+    def set_period(self, period: float) -> None:
+        self.proxy.set_polling(True, period, self._abs_change, self._rel_change)
+
+    def last_value(self) -> Any:
+        return self.proxy._last_reading["value"]
+
+    def restart(self) -> None:
+        """Restart a running poll loop, which sleeps with the period it last read."""
+        proxy = self.proxy
+        if proxy._poll_task is not None and proxy._callback is not None:
+            proxy._poll_task.cancel()
+            callback = proxy._callback
+            proxy._poll_task = None
+            proxy.subscribe_callback(callback)
+
+
+# ophyd-async versions whose AttributeProxy internals _PolledAttribute relies on
+_PRIVATE_API_VERSIONS = ("0.10.",)
+
+
+def _private_api_supported() -> bool:
+    return ophyd_async.__version__.startswith(_PRIVATE_API_VERSIONS)
+
+
+def _polled_attributes(
+    device: Device, fast_period: float | None
+) -> List[_PolledAttribute]:
+    """
+    Return the polled attributes of a device and its sub-devices. Sub-devices with
+    their own polling engine are left to it.
+    """
+    attributes = []
+    for _, child in device.children():
+        attribute = _PolledAttribute.of(child, fast_period)
+        if attribute is not None:
+            attributes.append(attribute)
+        elif getattr(child, "_polling_engine", None) is None:
+            attributes += _polled_attributes(child, fast_period)
+    return attributes
+
+
+class PollingEngine:
+    """
+    Adapts the polling periods of the polled Tango attributes of one device and its
+    sub-devices according to a PollingPolicy.
+    """
+
+    def __init__(self, device: Device, policy: PollingPolicy) -> None:
+        self.device = device
+        self.policy = policy
+        self._attributes: List[_PolledAttribute] = []
+        self._last_values: Dict[int, Any] = {}
+        self._scale = 1.0
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    def start(self) -> None:
+        """Collect the polled attributes of the device and start adapting them."""
+        if not _private_api_supported():
+            print(
+                f"Warning: adaptive polling of {self.device.name} is not supported"
+                f" with ophyd-async {ophyd_async.__version__}, the annotated polling"
+                " periods are used."
+            )
+            return
+        self._attributes = _polled_attributes(self.device, self.policy.fast_period)
+        self._scale = 1.0
+        self._apply()
+        if self._attributes and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def activate(self) -> None:
+        """Poll at the fast period again, e.g. at the start of a move."""
+        was_idle = self._scale > 1.0
+        self._scale = 1.0
+        self._apply()
+        if was_idle:
+            # A running poll loop sleeps with the old period; restart it so that the
+            # next poll happens at the fast period
+            for attribute in self._attributes:
+                attribute.restart()
+        self._wakeup.set()
+
+    def _period(self, fast: float) -> float:
+        return min(fast * self._scale, max(fast, self.policy.idle_period))
+
+    def _apply(self) -> None:
+        for attribute in self._attributes:
+            attribute.set_period(self._period(attribute.fast))
+
+    def _is_active(self) -> bool:
+        active = False
+        for attribute in self._attributes:
+            value = attribute.last_value()
+            if value is None:
+                continue
+            if isinstance(value, str) and value in self.policy.active_states:
+                active = True
+            last = self._last_values.get(id(attribute))
+            if last is not None and not np.array_equal(last, value):
+                active = True
+            self._last_values[id(attribute)] = value
+        return active
+
+    async def _run(self) -> None:
+        max_scale = max(
+            self.policy.idle_period / attribute.fast for attribute in self._attributes
+        )
+        while True:
+            # Check at the slowest period in use, every poll has happened by then
+            period = max(self._period(attribute.fast) for attribute in self._attributes)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), period)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            if self._is_active():
+                self._scale = 1.0
+            else:
+                self._scale = min(self._scale * self.policy.backoff, max(max_scale, 1.0))
+            self._apply()
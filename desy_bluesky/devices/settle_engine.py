@@ -0,0 +1,101 @@
+"""
+Windowed settle detection for slow positioners like temperature controllers.
+
+A SettleEngine is fed the readings of a process value while it approaches a target.
+The value is settled once the last `window` readings are all within `tolerance` of
+the target and, optionally, their slope and standard deviation are small enough:
+
+    engine = SettleEngine(tolerance=0.5, window=10, max_slope=0.1, max_std=0.05)
+    engine.add(timestamp, temperature)
+    if engine.settled(target):
+        ...
+    seconds = engine.eta(target, ramp_rate=5.0)
+
+Slopes and ramp rates are in units per minute, like SetpointRamp of the Eurotherm. The
+ETA follows the ramp rate if the controller ramps the setpoint, since the measured slope
+lags behind at the start of a move. With window 1 and no slope or variance limit,
+settling is the plain tolerance check.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from .signal_history import SignalHistory
+
+
+class SettleEngine:
+    """
+    Stability criteria over the last readings of one value.
+
+    :param tolerance: Largest distance from the target of every reading in the window.
+    :param window: Number of readings which must fulfil the criteria.
+    :param max_slope: Largest absolute slope (units per minute) of the readings in
+        the window, None to not check it.
+    :param max_std: Largest standard deviation of the readings in the window, None
+        to not check it.
+    """
+
+    def __init__(
+        self,
+        tolerance: float,
+        window: int = 1,
+        max_slope: float | None = None,
+        max_std: float | None = None,
+    ) -> None:
+        if window < 1:
+            raise ValueError(f"Settle window must be positive, got {window}")
+        self.tolerance = tolerance
+        self.window = window
+        self.max_slope = max_slope
+        self.max_std = max_std
+        # The slope for the ETA needs two readings even with a window of one
+        self.history = SignalHistory(max(window, 2))
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.history.append(timestamp, value)
+
+    def clear(self) -> None:
+        self.history.clear()
+
+    def slope(self) -> float | None:
+        """Slope of the readings in the window in units per minute."""
+        timestamps, values = self.history.last(max(self.window, 2))
+        if len(timestamps) < 2 or timestamps[-1] == timestamps[0]:
+            return None
+        return float(np.polyfit(timestamps - timestamps[0], values, 1)[0]) * 60.0
+
+    def settled(self, target: float) -> bool:
+        if len(self.history) < self.window:
+            return False
+        _, values = self.history.last(self.window)
+        if np.any(np.abs(values - target) > self.tolerance):
+            return False
+        if self.max_std is not None and np.std(values) > self.max_std:
+            return False
+        if self.max_slope is not None and self.window > 1:
+            slope = self.slope()
+            if slope is None or abs(slope) > self.max_slope:
+                return False
+        return True
+
+    def eta(self, target: float, ramp_rate: float | None = None) -> float | None:
+        """
+        Predict the seconds until the value is within tolerance of the target, from
+        the ramp rate (units per minute) of the controller if it ramps, and otherwise
+        from the measured slope if the value moves towards the target. None if there
+        is no prediction.
+        """
+        if not len(self.history):
+            return None
+        _, values = self.history.last(1)
+        distance = float(target - values[-1])
+        remaining = max(abs(distance) - self.tolerance, 0.0)
+        if remaining == 0.0:
+            return 0.0
+        if ramp_rate:
+            return remaining / abs(ramp_rate) * 60.0
+        slope = self.slope()
+        if slope is not None and slope * distance > 0:
+            return remaining / abs(slope) * 60.0
+        return None
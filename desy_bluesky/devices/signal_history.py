@@ -0,0 +1,109 @@
+"""
+Fixed-size history of signal readings.
+
+A SignalHistory keeps the last `size` readings of one signal in NumPy arrays. Every
+sample is written twice, at i and i + size, so that the last n samples are always a
+contiguous slice. Appending is O(1), and windows and decimated windows are views into
+the buffer without copying.
+
+FSECSubscribable devices keep one history per subscribed signal if history_size is
+set:
+
+    motor.history_size = 10000
+    await motor.connect()
+    ...
+    timestamps, values = motor.get_history(motor.Position).window(seconds=30)
+
+The views are only valid until the buffer wraps around them. Copy them if they are
+kept for longer than the next few updates, or if they are read from another thread.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Tuple
+
+import numpy as np
+
+
+class SignalHistory:
+    """
+    Ring buffer of timestamps and values of one signal.
+
+    :param size: Number of readings kept.
+    """
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError(f"History size must be positive, got {size}")
+        self.size = size
+        self.timestamps = np.zeros(2 * size, dtype=float)
+        # The value buffer is created on the first append, with the shape of the first
+        # value and a dtype which holds every later value of the signal (see _dtype)
+        self.values: np.ndarray | None = None
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: Any) -> None:
+        """Add a reading, overwriting the oldest one if the history is full."""
+        if self.values is None:
+            first = np.asarray(value)
+            self.values = np.zeros((2 * self.size,) + first.shape, dtype=_dtype(first))
+        i = self._next
+        self.timestamps[i] = self.timestamps[i + self.size] = timestamp
+        self.values[i] = self.values[i + self.size] = value
+        self._next = (i + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def append_reading(self, reading: dict) -> None:
+        """Add a bluesky Reading."""
+        self.append(reading["timestamp"], reading["value"])
+
+    def last(self, n: int | None = None, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return views of the timestamps and values of the last n readings (all if n is
+        None), oldest first, keeping every step-th reading.
+        """
+        n = self._count if n is None else min(n, self._count)
+        end = self._next + self.size
+        start = end - n
+        # Decimate from the newest reading backwards, so that it is always included
+        start += (n - 1) % step if n else 0
+        if self.values is None:
+            return self.timestamps[start:end:step], np.zeros(0)
+        return self.timestamps[start:end:step], self.values[start:end:step]
+
+    def window(
+        self, seconds: float, max_points: int | None = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return views of the readings of the last `seconds` seconds, relative to the
+        newest reading. With max_points the window is decimated to at most that many
+        readings.
+        """
+        timestamps, _ = self.last()
+        if not len(timestamps):
+            return self.last()
+        n = len(timestamps) - np.searchsorted(timestamps, timestamps[-1] - seconds)
+        step = 1 if not max_points else max(1, -(-n // max_points))
+        return self.last(n, step)
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+
+
+def _dtype(value: np.ndarray) -> np.dtype:
+    """
+    Buffer dtype for the values of a signal whose first value is value. Integers are
+    promoted to float, since a later reading of the same signal may be a float.
+    Strings and enums (e.g. DevStateEnum) are kept as objects, since a fixed-width
+    string dtype would truncate longer later values.
+    """
+    if value.dtype.kind in "iu":
+        return np.dtype(float)
+    if value.dtype.kind in "bfc":
+        return value.dtype
+    return np.dtype(object)
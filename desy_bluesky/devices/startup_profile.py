@@ -0,0 +1,205 @@
+"""
+Instrumentation of device startup.
+
+A StartupProfile records when each device passes through the phases of
+create_devices:
+
+- resolve driver: importing and looking up the device class, mostly while the device
+  list is validated, since the resolved classes are cached,
+- wait for dependencies: waiting for the devices referenced with '#device',
+- construct: calling the device constructor, which names the device and its children,
+- wait for connection slot: waiting for the connection limiter,
+- connect: connecting the device (Tango DeviceProxy creation and introspection).
+
+The profile produces a text report and a Chrome trace (chrome://tracing, Perfetto).
+
+Usage:
+
+    profile = StartupProfile()
+    await create_devices(devlist, namespace, profile=profile)
+    print(profile.report())
+    profile.save_chrome_trace("startup_trace.json")
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+RESOLVE_DRIVER = "resolve driver"
+WAIT_FOR_DEPENDENCIES = "wait for dependencies"
+CONSTRUCT = "construct"
+WAIT_FOR_CONNECTION_SLOT = "wait for connection slot"
+CONNECT = "connect"
+
+PHASES = [
+    RESOLVE_DRIVER,
+    WAIT_FOR_DEPENDENCIES,
+    CONSTRUCT,
+    WAIT_FOR_CONNECTION_SLOT,
+    CONNECT,
+]
+
+
+class StartupProfile:
+    """
+    Per-device phase timestamps of a device startup. All times are relative to the
+    creation of the profile, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.phases: Dict[str, List[Tuple[str, float, float]]] = {}
+        self.hosts: Dict[str, str | None] = {}
+
+    def now(self) -> float:
+        return time.perf_counter() - self._start
+
+    def record(self, device: str, phase: str, start: float, end: float) -> None:
+        """Record a phase of a device with start and end time from now()."""
+        self.phases.setdefault(device, []).append((phase, start, end))
+
+    @contextlib.contextmanager
+    def phase(self, device: str, phase: str):
+        """Record the time spent in the with block as a phase of a device."""
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.record(device, phase, start, self.now())
+
+    def duration(self, device: str, phase: str) -> float:
+        return sum(end - start for p, start, end in self.phases.get(device, []) if p == phase)
+
+    def end(self, device: str) -> float:
+        return max((end for _, _, end in self.phases.get(device, [])), default=0.0)
+
+    def report(self, dependencies: Dict[str, Set[str]] | None = None) -> str:
+        """
+        Return a text report with the phase durations of every device, the totals
+        per phase, the connect time per Tango host, the connect latency histogram and,
+        if the dependency graph is given, the critical path.
+        """
+        if not self.phases:
+            return "No devices profiled."
+        devices = sorted(self.phases, key=self.end)
+        width = max(len(device) for device in devices + ["device"])
+        short = ["driver", "deps", "construct", "slot", "connect"]
+        lines = [
+            f"Device startup report: wall time {max(map(self.end, devices)):.3f} s,"
+            f" {len(devices)} devices",
+            f"  {'device':<{width}}  "
+            + "  ".join(f"{name:>9}" for name in short)
+            + f"  {'done at':>9}",
+        ]
+        for device in devices:
+            lines.append(
+                f"  {device:<{width}}  "
+                + "  ".join(f"{self.duration(device, p):>9.3f}" for p in PHASES)
+                + f"  {self.end(device):>9.3f}"
+            )
+        lines.append(
+            f"  {'total':<{width}}  "
+            + "  ".join(
+                f"{sum(self.duration(d, p) for d in devices):>9.3f}" for p in PHASES
+            )
+        )
+
+        lines.extend(self._host_report(devices))
+        lines.extend(self._connect_histogram(devices))
+        if dependencies:
+            lines.append(self._critical_path(dependencies))
+        return "\n".join(lines)
+
+    def _host_report(self, devices: List[str]) -> List[str]:
+        hosts: Dict[str, List[float]] = {}
+        for device in devices:
+            host = self.hosts.get(device)
+            if host is not None:
+                hosts.setdefault(host or "TANGO_HOST", []).append(
+                    self.duration(device, CONNECT)
+                )
+        if not hosts:
+            return []
+        lines = ["Connect time per Tango host:"]
+        for host, times in sorted(hosts.items(), key=lambda h: -max(h[1])):
+            lines.append(
+                f"  {host}: {len(times)} devices, total {sum(times):.3f} s,"
+                f" mean {sum(times) / len(times):.3f} s, max {max(times):.3f} s"
+            )
+        return lines
+
+    def _connect_histogram(self, devices: List[str]) -> List[str]:
+        connect_times = {
+            device: self.duration(device, CONNECT)
+            for device in devices
+            if any(p == CONNECT for p, _, _ in self.phases[device])
+        }
+        if not connect_times:
+            return []
+        bins = [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0]
+        labels = [f"< {b:g} s" for b in bins] + [f">= {bins[-1]:g} s"]
+        counts = [0] * len(labels)
+        for latency in connect_times.values():
+            counts[next((i for i, b in enumerate(bins) if latency < b), len(bins))] += 1
+
+        lines = [f"Device connect latency ({len(connect_times)} devices):"]
+        scale = 40 / max(counts)
+        for label, count in zip(labels, counts):
+            lines.append(f"  {label:>9}  {count:>5}  {'#' * round(count * scale)}")
+        slowest = sorted(connect_times, key=connect_times.get, reverse=True)[:5]
+        lines.append(
+            "  Slowest: "
+            + ", ".join(f"{dev} ({connect_times[dev]:.3f} s)" for dev in slowest)
+        )
+        return lines
+
+    def _critical_path(self, dependencies: Dict[str, Set[str]]) -> str:
+        # Follow the dependency which finished last back from the last device done
+        device = max(self.phases, key=self.end)
+        path = [device]
+        while dependencies.get(device):
+            device = max(dependencies[device], key=self.end)
+            path.append(device)
+        return (
+            f"Critical path: {' -> '.join(reversed(path))}"
+            f" ({self.end(path[0]):.3f} s)"
+        )
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Return the profile in the Chrome trace event format, with one track per
+        device.
+        """
+        events = []
+        devices = sorted(self.phases, key=lambda d: min(s for _, s, _ in self.phases[d]))
+        for tid, device in enumerate(devices):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 0,
+                    "tid": tid,
+                    "args": {"name": device},
+                }
+            )
+            for phase, start, end in self.phases[device]:
+                events.append(
+                    {
+                        "name": phase,
+                        "cat": "device_init",
+                        "ph": "X",
+                        "ts": start * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": 0,
+                        "tid": tid,
+                        "args": {"device": device, "host": self.hosts.get(device)},
+                    }
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
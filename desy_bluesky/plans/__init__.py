@@ -8,6 +8,7 @@ from .settings import (
 )
 from .ramp_dwell_read import ramp_dwell_read
 from .ramp import ramp
+from .ramp_array import ramp_array
 from .dwell import dwell
 
 __all__ = [
@@ -19,5 +20,6 @@ __all__ = [
     "use_settings",
     "ramp_dwell_read",
     "ramp",
+    "ramp_array",
     "dwell",
 ]
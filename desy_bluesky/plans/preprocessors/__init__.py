@@ -1,3 +1,4 @@
 from .inject_md import InjectMD
+from .lazy_devices import resolve_lazy_devices_wrapper
 
-__all__ = ["InjectMD"]
+__all__ = ["InjectMD", "resolve_lazy_devices_wrapper"]
@@ -0,0 +1,84 @@
+from bluesky import Msg
+from bluesky.preprocessors import plan_mutator
+
+
+def _is_lazy(obj) -> bool:
+    # LazyDevice is checked by a marker, so that the plans do not import device_init
+    return getattr(type(obj), "_lazy_device", False)
+
+
+def _placeholder(obj):
+    """
+    Return obj if it is a LazyDevice placeholder, the placeholder of the unconnected
+    device obj is a child of (e.g. lazy.Position), or None.
+    """
+    if _is_lazy(obj):
+        return obj
+    while getattr(obj, "parent", None) is not None:
+        obj = obj.parent
+    placeholder = getattr(obj, "_lazy_placeholder", None)
+    if _is_lazy(placeholder) and not placeholder.resolved:
+        return placeholder
+    return None
+
+
+def _find_lazy_devices(msg: Msg) -> list:
+    candidates = [msg.obj, *msg.args]
+    for arg in msg.args:
+        if isinstance(arg, (list, tuple)):
+            candidates.extend(arg)
+    lazy_devices = []
+    for obj in candidates:
+        placeholder = _placeholder(obj)
+        if placeholder is not None and placeholder not in lazy_devices:
+            lazy_devices.append(placeholder)
+    return lazy_devices
+
+
+def _replace(value):
+    if _is_lazy(value):
+        return value._device
+    if isinstance(value, list):
+        return [_replace(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_replace(v) for v in value)
+    return value
+
+
+def resolve_lazy_devices_wrapper(plan):
+    """
+    Connect the LazyDevice placeholders used by a plan the first time a message
+    refers to them or to one of their children (e.g. lazy.Position), and pass the
+    real devices on to the RunEngine.
+
+    Add it to the RunEngine to apply it to every plan:
+
+        RE.preprocessors.append(resolve_lazy_devices_wrapper)
+    """
+
+    def _resolve(msg):
+        lazy_devices = _find_lazy_devices(msg)
+        if not lazy_devices:
+            return None, None
+
+        def _connect_and_forward():
+            unresolved = [device for device in lazy_devices if not device.resolved]
+            if unresolved:
+                futures = yield Msg(
+                    "wait_for", None, [device.connect for device in unresolved]
+                )
+                for device, future in zip(unresolved, futures):
+                    exc = future.exception()
+                    if exc is not None:
+                        raise RuntimeError(
+                            f"Lazy device {device.name} could not be connected."
+                        ) from exc
+            return (
+                yield msg._replace(
+                    obj=_replace(msg.obj), args=tuple(_replace(a) for a in msg.args)
+                )
+            )
+
+        return _connect_and_forward(), None
+
+    return (yield from plan_mutator(plan, _resolve))
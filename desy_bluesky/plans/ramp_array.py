@@ -0,0 +1,78 @@
+import bluesky.plan_stubs as bps
+from bluesky.protocols import Readable, Movable
+from typing import Any, Dict, List
+import time
+
+
+def ramp_array(
+    controllers: List[Movable],
+    readables: List[Readable],
+    setpoints: float | List[float] | Dict[str, float],
+    sample_period: float,
+    dwell_time: float = 0.0,
+    md: Dict[str, Any] | None = None,
+):
+    """
+    Ramp several temperature controllers concurrently and read them and the detectors
+    at the specified sample rate until all of them are settled, then dwell.
+
+    The controllers are driven by one Eurotherm3216Array, which watches all of them
+    with one loop and reports their combined progress.
+
+    Parameters
+    ----------
+    controllers : List[Eurotherm3216] or Eurotherm3216Array
+        The temperature controllers to be ramped.
+    readables : List[Readable]
+        The detectors or Readable devices to be read.
+    setpoints : float, Sequence[float] or dict
+        One setpoint for all controllers, one setpoint per controller, or a dict of
+        controller names and setpoints.
+    sample_period (s) : float
+        The period at which to sample the controllers and the detectors.
+    dwell_time (s) : float, optional
+        The time to keep reading once all controllers are settled.
+    md : dict, optional
+        Metadata to include in the run.
+    """
+    # Imported here, so that importing the plans does not load the Tango devices
+    from ..devices import Eurotherm3216Array
+
+    if isinstance(controllers, Eurotherm3216Array):
+        array = controllers
+    else:
+        array = Eurotherm3216Array(controllers, name="eurotherms")
+
+    _md = {
+        "plan_name": "ramp_array",
+        "motors": [c.name for c in array.controllers],
+        "detectors": [det.name for det in readables]
+        + [c.name for c in array.controllers],
+        "plan_args": {
+            "controllers": [c.name for c in array.controllers],
+            "readables": [det.name for det in readables],
+            "setpoints": setpoints,
+            "sample_period": sample_period,
+            "dwell_time": dwell_time,
+        },
+    }
+
+    if md is not None:
+        _md.update(md)
+
+    yield from bps.open_run(md=_md)
+    yield from bps.checkpoint()
+    ramp_status = yield from bps.abs_set(array, setpoints, group="ramp", wait=False)
+    readables_and_controllers = list(array.controllers) + readables
+    sample_period = float(sample_period)
+    while not ramp_status.done:
+        yield from bps.trigger_and_read(readables_and_controllers)
+        yield from bps.sleep(sample_period)
+    yield from bps.wait("ramp")
+
+    start_of_dwell = time.time()
+    while time.time() - start_of_dwell < dwell_time:
+        yield from bps.trigger_and_read(readables_and_controllers)
+        yield from bps.sleep(sample_period)
+    yield from bps.trigger_and_read(readables_and_controllers)
+    yield from bps.close_run()
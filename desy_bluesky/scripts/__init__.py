@@ -1,4 +1,25 @@
-from .run_sequence import run_user_sequence
+import importlib
+
+# parse_yml only needs yaml and is imported eagerly: importing the submodule
+# desy_bluesky.scripts.parse_yml would otherwise bind the package attribute to the
+# module instead of the function. run_sequence is imported on first attribute access,
+# so that tools which only need parse_yml do not import bluesky.
 from .parse_yml import parse_yml
 
+_SUBMODULES = {
+    "run_user_sequence": ".run_sequence",
+}
+
 __all__ = ["run_user_sequence", "parse_yml"]
+
+
+def __getattr__(name: str):
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SUBMODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from ophyd_async.core import (
+    Device,
+    StandardReadable,
+    StandardReadableFormat as Format,
+    soft_signal_rw,
+)
+
+from desy_bluesky.devices import device_init
+from desy_bluesky.devices.fsec_readable_device import FSECSubscribable
+
+
+class StubDevice(Device):
+    """
+    Device without hardware which takes connect_time seconds to connect. Other
+    devices are passed as source and sources, like '#device' references in a device
+    list.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        connect_time: float = 0.0,
+        source=None,
+        sources=None,
+    ) -> None:
+        self.connect_time = connect_time
+        # Kept in a dict, so that the devices do not become children and keep their
+        # names
+        self.references = {"source": source, "sources": sources}
+        self.connected = False
+        self.disconnected = False
+        super().__init__(name=name)
+
+    async def connect(self, *args, **kwargs) -> None:
+        await asyncio.sleep(self.connect_time)
+        self.connected = True
+
+    def disconnect(self) -> None:
+        self.disconnected = True
+
+
+@pytest.fixture(autouse=True)
+def reset_device_init():
+    """create_devices keeps the live devices in module globals"""
+    yield
+    device_init.DEVICE_FUTURES.clear()
+    device_init.DEVICES_TO_BE_CREATED.clear()
+    device_init.DEVICE_CONFIGS.clear()
+    device_init.DEVICE_DEPENDENCIES.clear()
+
+
+def stub_entry(name: str, **kwargs) -> dict:
+    """device list entry of a StubDevice"""
+    return {"driver": "StubDevice", "kwargs": {"name": name, **kwargs}}
+
+
+class SoftSubscribable(FSECSubscribable, StandardReadable):
+    """FSECSubscribable with hinted soft signals sig0, sig1, ..."""
+
+    def __init__(self, signals: int = 2, name: str = "") -> None:
+        with self.add_children_as_readables(Format.HINTED_SIGNAL):
+            for i in range(signals):
+                setattr(self, f"sig{i}", soft_signal_rw(float, 0.0))
+        super().__init__(name=name)
@@ -0,0 +1,211 @@
+import asyncio
+import time
+
+import pytest
+
+from desy_bluesky.devices.device_init import (
+    _check_device_list,
+    _ConnectionLimiter,
+    _find_cycles,
+    _get_creation_order,
+    _get_dependencies,
+    _get_tango_host,
+    create_devices,
+    reload_devices,
+)
+
+from conftest import StubDevice, stub_entry
+
+
+def test_creation_order_puts_dependencies_first():
+    dependencies = {"a": {"b", "c"}, "b": {"c"}, "c": set(), "d": set()}
+    order = _get_creation_order(dependencies)
+    assert sorted(order) == ["a", "b", "c", "d"]
+    for device, device_dependencies in dependencies.items():
+        for dependency in device_dependencies:
+            assert order.index(dependency) < order.index(device)
+
+
+def test_creation_order_rejects_cycles():
+    with pytest.raises(ValueError, match="Circular dependency"):
+        _get_creation_order({"a": {"b"}, "b": {"a"}, "c": set()})
+
+
+def test_dependencies_from_device_references():
+    devlist = {
+        "a": stub_entry("a", source="b#device", sources=["c#device", "x#device"]),
+        "b": stub_entry("b", sources={"counter": "c#device"}),
+        "c": stub_entry("c", connect_time=0.1),
+    }
+    # x is not in the device list, it is taken from the namespace
+    assert _get_dependencies(devlist) == {"a": {"b", "c"}, "b": {"c"}, "c": set()}
+
+
+def test_create_devices_passes_dependencies():
+    namespace = {"StubDevice": StubDevice}
+    devlist = {
+        "a": stub_entry("a", source="b#device", sources=["c#device"]),
+        "b": stub_entry("b"),
+        "c": stub_entry("c"),
+    }
+    devices = asyncio.run(create_devices(devlist, namespace))
+    assert set(devices) == {"a", "b", "c"}
+    assert namespace["a"].references["source"] is namespace["b"]
+    assert namespace["a"].references["sources"] == [namespace["c"]]
+    assert all(device.connected for device in devices.values())
+
+
+def test_startup_follows_the_critical_path():
+    # A chain of 5 devices and 20 independent devices, 0.1 s connect each. The
+    # startup takes the time of the chain, not of all devices one after another.
+    namespace = {"StubDevice": StubDevice}
+    devlist = {"d0": stub_entry("d0", connect_time=0.1)}
+    for i in range(1, 5):
+        devlist[f"d{i}"] = stub_entry(f"d{i}", connect_time=0.1, source=f"d{i-1}#device")
+    for i in range(20):
+        devlist[f"free{i}"] = stub_entry(f"free{i}", connect_time=0.1)
+    start = time.perf_counter()
+    asyncio.run(create_devices(devlist, namespace))
+    elapsed = time.perf_counter() - start
+    assert 0.5 <= elapsed < 1.5
+    assert namespace["d4"].references["source"] is namespace["d3"]
+
+
+def test_find_cycles_reports_every_cycle():
+    dependencies = {
+        "a": {"b"},
+        "b": {"c"},
+        "c": {"a"},
+        "d": {"d"},
+        "e": {"a", "f"},
+        "f": {"g"},
+        "g": {"f"},
+        "h": set(),
+    }
+    assert sorted(_find_cycles(dependencies)) == [["a", "b", "c"], ["d"], ["f", "g"]]
+
+
+def test_find_cycles_on_a_long_chain():
+    # The search is iterative, a chain longer than the recursion limit works
+    dependencies = {f"d{i}": {f"d{i + 1}"} for i in range(5000)}
+    dependencies["d5000"] = set()
+    assert _find_cycles(dependencies) == []
+    dependencies["d5000"] = {"d0"}
+    assert [len(cycle) for cycle in _find_cycles(dependencies)] == [5001]
+
+
+def test_check_device_list_collects_all_errors():
+    namespace = {"StubDevice": StubDevice, "x": StubDevice(name="x")}
+    devlist = {
+        "a": stub_entry("a", source="b#device"),
+        "b": stub_entry("b", source="a#device"),
+        "c": stub_entry("c", sources=["missing#device", "x#device"]),
+        "d": {"driver": "NoSuchDriver", "kwargs": {"name": "d"}},
+    }
+    with pytest.raises(ValueError) as error:
+        _check_device_list(devlist, _get_dependencies(devlist), namespace)
+    message = str(error.value)
+    assert "Circular dependency between devices: a, b" in message
+    assert "references missing#device" in message
+    assert "x#device" not in message
+    assert "unknown driver 'NoSuchDriver'" in message
+
+
+def test_create_devices_rejects_an_invalid_device_list():
+    namespace = {"StubDevice": StubDevice}
+    devlist = {
+        "a": stub_entry("a", source="missing#device"),
+        "b": stub_entry("b"),
+    }
+    with pytest.raises(ValueError, match="missing"):
+        asyncio.run(create_devices(devlist, namespace))
+    # Nothing is created from an invalid device list
+    assert "b" not in namespace
+
+
+@pytest.mark.parametrize(
+    "uri, host",
+    [
+        ("tango://haspp09:10000/p09/motor/exp.01", "haspp09:10000"),
+        ("haspp09:10000/p09/motor/exp.01", "haspp09:10000"),
+        ("tango://haspp09:10000/p09/motor/exp.01#dbase=no", "haspp09:10000"),
+        ("p09/motor/exp.01", "tangohost:10000"),
+        ("not a trl", None),
+        (None, None),
+        (42, None),
+    ],
+)
+def test_get_tango_host(monkeypatch, uri, host):
+    monkeypatch.setenv("TANGO_HOST", "tangohost:10000")
+    assert _get_tango_host(uri) == host
+
+
+def test_connection_limiter():
+    limiter = _ConnectionLimiter(max_connections=3, max_connections_per_host=2)
+    in_flight = {}
+    peak = {}
+
+    async def connect(uri):
+        host = _get_tango_host(uri) or "no host"
+        async with limiter.slot(uri):
+            for key in (host, "total"):
+                in_flight[key] = in_flight.get(key, 0) + 1
+                peak[key] = max(peak.get(key, 0), in_flight[key])
+            await asyncio.sleep(0.01)
+            for key in (host, "total"):
+                in_flight[key] -= 1
+
+    async def main():
+        uris = [f"host{i % 2}:10000/test/stub/{i}" for i in range(10)]
+        await asyncio.gather(*(connect(uri) for uri in uris + [None] * 4))
+
+    asyncio.run(main())
+    assert peak["host0:10000"] == peak["host1:10000"] == 2
+    assert peak["total"] == 3
+
+
+def test_reload_devices():
+    namespace = {"StubDevice": StubDevice}
+    devlist = {
+        "a": stub_entry("a", source="b#device"),
+        "b": stub_entry("b"),
+        "c": stub_entry("c", source="a#device"),
+        "d": stub_entry("d"),
+        "e": stub_entry("e"),
+    }
+    asyncio.run(create_devices(devlist, namespace))
+    old = {name: namespace[name] for name in devlist}
+
+    # b changes, so a and c, which depend on it, are recreated. e is removed, f is
+    # added and d is left untouched.
+    new_devlist = {name: devlist[name] for name in "abcd"}
+    new_devlist["b"] = stub_entry("b", connect_time=0.01)
+    new_devlist["f"] = stub_entry("f", source="d#device")
+    created = asyncio.run(reload_devices(new_devlist, namespace))
+
+    assert set(created) == {"a", "b", "c", "f"}
+    assert "e" not in namespace
+    assert namespace["d"] is old["d"]
+    assert not old["d"].disconnected
+    for name in "abce":
+        assert old[name].disconnected
+    for name in "abc":
+        assert namespace[name] is not old[name]
+    assert namespace["a"].references["source"] is namespace["b"]
+    assert namespace["c"].references["source"] is namespace["a"]
+    assert namespace["f"].references["source"] is old["d"]
+
+    # Nothing changed
+    assert asyncio.run(reload_devices(new_devlist, namespace)) == {}
+
+
+def test_reload_devices_validates_first():
+    namespace = {"StubDevice": StubDevice}
+    devlist = {"a": stub_entry("a"), "b": stub_entry("b", source="a#device")}
+    asyncio.run(create_devices(devlist, namespace))
+    a = namespace["a"]
+    # b would lose the device it depends on
+    with pytest.raises(ValueError, match="a#device"):
+        asyncio.run(reload_devices({"b": stub_entry("b", sources=["a#device"])}, namespace))
+    assert namespace["a"] is a
+    assert not a.disconnected
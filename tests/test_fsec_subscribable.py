@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import SoftSubscribable
+
+
+def test_updates_are_coalesced():
+    async def main():
+        device = SoftSubscribable(3, name="soft")
+        await device.connect()
+        received = []
+        device.subscribe(received.append)
+        for value in range(10):
+            await device.sig0.set(value)
+            await device.sig1.set(-value)
+        await asyncio.sleep(2 * device.callback_window)
+        device.disconnect()
+        return received
+
+    received = asyncio.run(main())
+    assert len(received) == 1
+    assert {key: r["value"] for key, r in received[0].items()} == {
+        "soft-sig0": 9.0,
+        "soft-sig1": -9.0,
+        "soft-sig2": 0.0,
+    }
+
+
+@pytest.mark.parametrize("policy, expected", [("latest", [0, 8, 9]), ("drop", [0, 1, 2])])
+def test_slow_threaded_subscriber(policy, expected):
+    # The subscriber blocks on the first reading while 9 more arrive, 2 are queued
+    release = threading.Event()
+    received = []
+
+    def slow(readings):
+        release.wait(timeout=5)
+        received.append(readings["soft-sig0"]["value"])
+
+    async def main():
+        device = SoftSubscribable(1, name="soft")
+        device.callback_window = 0
+        device.callback_queue_size = 2
+        device.callback_policy = policy
+        await device.connect()
+        device.subscribe(slow, threaded=True)
+        for value in range(10):
+            await device.sig0.set(value)
+            await asyncio.sleep(0.01)
+        (subscriber,) = device._subscribers
+        release.set()
+        while subscriber.queue or subscriber.busy:
+            await asyncio.sleep(0.01)
+        device.disconnect()
+        return subscriber.dropped
+
+    dropped = asyncio.run(main())
+    assert received == expected
+    assert dropped == 7
+
+
+def test_subscribe_errors():
+    async def main():
+        device = SoftSubscribable(name="soft")
+        await device.connect()
+        device.subscribe(print)
+        with pytest.raises(ValueError, match="already subscribed"):
+            device.subscribe(print)
+        device.clear_sub(print)
+        with pytest.raises(ValueError, match="not subscribed"):
+            device.clear_sub(print)
+        device.disconnect()
+
+    asyncio.run(main())
+
+
+def test_disconnect_stops_the_callbacks():
+    async def main():
+        device = SoftSubscribable(name="soft")
+        await device.connect()
+        received = []
+        device.subscribe(received.append)
+        await device.sig0.set(1.0)
+        device.disconnect()
+        await device.sig0.set(2.0)
+        await asyncio.sleep(2 * device.callback_window)
+        return received
+
+    assert asyncio.run(main()) == []
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import desy_bluesky.devices
+import desy_bluesky.scripts
+
+
+def test_package_import_is_lazy():
+    code = (
+        "import sys, desy_bluesky.devices, desy_bluesky.scripts; "
+        "print(' '.join(m for m in ('tango', 'ophyd_async', 'bluesky') if m in sys.modules))"
+    )
+    # Run from the repository root, which python -c puts on sys.path
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[1],
+    ).stdout
+    assert output.split() == []
+
+
+@pytest.mark.parametrize("package", [desy_bluesky.devices, desy_bluesky.scripts])
+def test_public_names_resolve(package):
+    for name in package.__all__:
+        assert getattr(package, name).__name__ == name
+    assert set(package.__all__) <= set(dir(package))
+    with pytest.raises(AttributeError):
+        package.NoSuchName
+
+
+def test_scripts_parse_yml_is_the_function():
+    import desy_bluesky.scripts.parse_yml  # noqa: F401
+
+    assert callable(desy_bluesky.scripts.parse_yml)
@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+from desy_bluesky.devices.attribute_cache import (
+    TangoAttributeCache,
+    set_attribute_cache,
+)
+from desy_bluesky.devices.pilc import (
+    IO_PROPERTIES,
+    PiLC,
+    _port_map_from_json,
+    discover_port_map,
+    port_map_entry,
+    validate_port_map,
+)
+
+READABLE = ["ADC", "Encoder"]
+MOVABLE = ["DAC"]
+
+
+def pilc_attributes() -> set:
+    # ADC on port 1, DAC on port 2, TTL IO on 3, NIM IO on 4, virtual IO on 5
+    attributes = {"ADC_1", "DAC_2", "IO_Resistor_3", "IO_Level_4", "Clk_1"}
+    for num, module in [(3, "IO"), (4, "IO"), (5, "VIO")]:
+        attributes |= {f"{module}_{prop}_{num}" for prop in IO_PROPERTIES}
+    return attributes
+
+
+def test_discover_port_map():
+    port_map = discover_port_map(pilc_attributes(), READABLE, MOVABLE)
+    assert sorted(port_map) == [1, 2, 3, 4, 5]
+    assert port_map[1] == port_map_entry("ADC", "readable", 1)
+    assert port_map[2] == {"module": "DAC", "kind": "movable", "attributes": ["DAC_2"]}
+    assert [port_map[num]["kind"] for num in (3, 4, 5)] == ["IOt", "IOnt", "VIO"]
+    assert "IO_Resistor_3" in port_map[3]["attributes"]
+    assert "IO_Level_4" in port_map[4]["attributes"]
+    assert validate_port_map(port_map, pilc_attributes()) == []
+
+
+def test_discover_port_map_with_port_config(capsys):
+    port_config = {1: "ADC", 3: "IO", 7: "Unknown"}
+    port_map = discover_port_map(pilc_attributes(), READABLE, MOVABLE, port_config)
+    assert sorted(port_map) == [1, 3]
+    assert port_map[3]["kind"] == "IOt"
+    assert "unknown module: 'Unknown'" in capsys.readouterr().out
+
+
+def test_validate_port_map():
+    port_map = discover_port_map(pilc_attributes(), READABLE, MOVABLE)
+    attributes = pilc_attributes() - {"DAC_2", "IO_DIR_3"}
+    assert validate_port_map(port_map, attributes) == ["DAC_2", "IO_DIR_3"]
+
+
+def test_port_map_json_round_trip():
+    port_map = discover_port_map(pilc_attributes(), READABLE, MOVABLE)
+    assert _port_map_from_json(json.loads(json.dumps(port_map))) == port_map
+    assert _port_map_from_json(None) is None
+
+
+def test_port_map_is_cached(tmp_path, capsys):
+    pilc = SimpleNamespace(
+        trl="tango://host:10000/test/pilc/1",
+        port_map=None,
+        port_config=None,
+        readable_module_types=READABLE,
+        movable_module_types=MOVABLE,
+    )
+    cache = TangoAttributeCache(str(tmp_path / "cache.json"))
+    set_attribute_cache(cache)
+    try:
+        port_map = PiLC._get_port_map(pilc, pilc_attributes())
+        cache.save()
+        set_attribute_cache(TangoAttributeCache(str(tmp_path / "cache.json")))
+        # The cached port map is used, although the discovery would now differ
+        assert PiLC._get_port_map(pilc, pilc_attributes() | {"ADC_6"}) == port_map
+        # A cached port map which does not match the device is discovered again
+        attributes = pilc_attributes() - {"DAC_2"}
+        assert sorted(PiLC._get_port_map(pilc, attributes)) == [1, 3, 4, 5]
+        assert "does not match the device (missing DAC_2)" in capsys.readouterr().out
+    finally:
+        set_attribute_cache(None)
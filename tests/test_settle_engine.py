@@ -0,0 +1,60 @@
+import pytest
+
+from desy_bluesky.devices.settle_engine import SettleEngine
+
+
+def test_plain_tolerance():
+    engine = SettleEngine(tolerance=0.5)
+    assert not engine.settled(20.0)
+    engine.add(0.0, 19.6)
+    assert engine.settled(20.0)
+    engine.add(1.0, 19.4)
+    assert not engine.settled(20.0)
+
+
+def test_window_and_std():
+    engine = SettleEngine(tolerance=1.0, window=4, max_std=0.1)
+    for t, value in enumerate([19.5, 20.4, 19.6, 20.4]):
+        engine.add(float(t), value)
+    # All readings are within tolerance, but they scatter too much
+    assert not engine.settled(20.0)
+    for t, value in enumerate([20.0, 20.05, 19.95, 20.0], start=4):
+        engine.add(float(t), value)
+    assert engine.settled(20.0)
+    engine.clear()
+    assert not engine.settled(20.0)
+
+
+def test_slope():
+    engine = SettleEngine(tolerance=1.0, window=5, max_slope=1.0)
+    # 0.1 units per 10 s are 0.6 units per minute
+    for t in range(5):
+        engine.add(10.0 * t, 19.0 + 0.1 * t)
+    assert engine.slope() == pytest.approx(0.6)
+    assert engine.settled(19.2)
+    engine = SettleEngine(tolerance=1.0, window=5, max_slope=1.0)
+    # 0.1 units per second are 6 units per minute
+    for t in range(5):
+        engine.add(float(t), 19.8 + 0.1 * t)
+    assert engine.slope() == pytest.approx(6.0)
+    assert not engine.settled(20.0)
+
+
+def test_eta():
+    engine = SettleEngine(tolerance=0.5)
+    assert engine.eta(20.0) is None
+    engine.add(0.0, 10.0)
+    # With a single reading only the ramp rate gives a prediction
+    assert engine.eta(20.0) is None
+    assert engine.eta(20.0, ramp_rate=6.0) == pytest.approx(95.0)
+    engine.add(60.0, 12.0)
+    # 2 units per minute, 7.5 units to go
+    assert engine.eta(20.0) == pytest.approx(225.0)
+    # Moving away from the target
+    assert engine.eta(0.0) is None
+    assert engine.eta(12.3) == 0.0
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        SettleEngine(tolerance=1.0, window=0)
@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from desy_bluesky.devices.signal_history import SignalHistory
+
+from conftest import SoftSubscribable
+
+
+def test_last_wraps_around():
+    history = SignalHistory(4)
+    assert len(history) == 0
+    for i in range(6):
+        history.append(float(i), 10 * i)
+    assert len(history) == 4
+    timestamps, values = history.last()
+    assert timestamps.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert values.tolist() == [20.0, 30.0, 40.0, 50.0]
+    # The last readings are a view into the buffer
+    assert values.base is history.values
+    assert history.last(2)[1].tolist() == [40.0, 50.0]
+    assert history.last(10)[1].tolist() == [20.0, 30.0, 40.0, 50.0]
+
+
+def test_decimation_keeps_the_newest_reading():
+    history = SignalHistory(10)
+    for i in range(10):
+        history.append(float(i), i)
+    assert history.last(step=3)[1].tolist() == [0.0, 3.0, 6.0, 9.0]
+    assert history.last(8, step=3)[1].tolist() == [3.0, 6.0, 9.0]
+
+
+def test_window():
+    history = SignalHistory(100)
+    assert len(history.window(1.0)[0]) == 0
+    for i in range(100):
+        history.append(0.1 * i, i)
+    timestamps, values = history.window(1.0)
+    assert values.tolist() == list(range(89, 100))
+    _, values = history.window(5.0, max_points=10)
+    assert len(values) <= 10
+    assert values[-1] == 99
+
+
+def test_value_types():
+    history = SignalHistory(3)
+    history.append(0.0, 1)
+    history.append(1.0, 2.5)
+    assert history.last()[1].tolist() == [1.0, 2.5]
+
+    history = SignalHistory(3)
+    history.append(0.0, "ON")
+    history.append(1.0, "MOVING")
+    assert history.last()[1].tolist() == ["ON", "MOVING"]
+
+    history = SignalHistory(3)
+    history.append(0.0, np.arange(4))
+    history.append_reading({"timestamp": 1.0, "value": np.ones(4), "alarm_severity": 0})
+    timestamps, values = history.last()
+    assert timestamps.tolist() == [0.0, 1.0]
+    assert values.shape == (2, 4)
+
+
+def test_clear_and_size():
+    history = SignalHistory(2)
+    history.append(0.0, 1.0)
+    history.clear()
+    assert len(history) == 0
+    assert len(history.last()[0]) == 0
+    with pytest.raises(ValueError):
+        SignalHistory(0)
+
+
+def test_device_history():
+    async def main():
+        device = SoftSubscribable(name="soft")
+        device.history_size = 5
+        await device.connect()
+        for value in range(1, 8):
+            await device.sig0.set(value)
+        values = device.get_history(device.sig0).last()[1].tolist()
+        with pytest.raises(KeyError):
+            device.get_history("soft-unknown")
+        device.disconnect()
+        return values
+
+    assert asyncio.run(main()) == [3.0, 4.0, 5.0, 6.0, 7.0]
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from desy_bluesky.devices.device_init import create_devices
+from desy_bluesky.devices.startup_profile import (
+    CONNECT,
+    CONSTRUCT,
+    PHASES,
+    WAIT_FOR_DEPENDENCIES,
+    StartupProfile,
+)
+
+from conftest import StubDevice, stub_entry
+
+
+def test_phases_and_report():
+    profile = StartupProfile()
+    profile.record("a", CONNECT, 0.0, 0.5)
+    profile.record("b", WAIT_FOR_DEPENDENCIES, 0.0, 0.5)
+    profile.record("b", CONNECT, 0.5, 0.7)
+    profile.record("b", CONNECT, 0.8, 0.9)
+    profile.hosts.update({"a": "host:10000", "b": ""})
+    with profile.phase("c", CONSTRUCT):
+        pass
+
+    assert abs(profile.duration("b", CONNECT) - 0.3) < 1e-9
+    assert profile.duration("b", CONSTRUCT) == 0.0
+    assert profile.end("b") == 0.9
+    assert profile.end("unknown") == 0.0
+
+    report = profile.report({"a": set(), "b": {"a"}, "c": set()})
+    assert "wall time 0.900 s, 3 devices" in report
+    assert "host:10000: 1 devices" in report
+    assert "TANGO_HOST: 1 devices" in report
+    assert "Device connect latency (2 devices)" in report
+    assert "Critical path: a -> b (0.900 s)" in report
+    assert StartupProfile().report() == "No devices profiled."
+
+
+def test_chrome_trace(tmp_path):
+    profile = StartupProfile()
+    profile.record("a", CONNECT, 0.1, 0.3)
+    profile.record("b", CONSTRUCT, 0.0, 0.1)
+    path = tmp_path / "trace.json"
+    profile.save_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+
+    names = [e["args"]["name"] for e in events if e["ph"] == "M"]
+    assert names == ["b", "a"]
+    (connect,) = [e for e in events if e["ph"] == "X" and e["name"] == CONNECT]
+    assert connect["tid"] == 1
+    assert connect["ts"] == 0.1 * 1e6
+    assert abs(connect["dur"] - 0.2 * 1e6) < 1e-6
+
+
+def test_create_devices_profile():
+    namespace = {"StubDevice": StubDevice}
+    devlist = {
+        "a": stub_entry("a", source="b#device", connect_time=0.05),
+        "b": stub_entry("b", connect_time=0.1),
+    }
+    profile = StartupProfile()
+    asyncio.run(create_devices(devlist, namespace, profile=profile))
+
+    assert set(profile.phases) == {"a", "b"}
+    for device in "ab":
+        assert {phase for phase, _, _ in profile.phases[device]} <= set(PHASES)
+    assert profile.duration("b", CONNECT) >= 0.1
+    assert profile.duration("a", WAIT_FOR_DEPENDENCIES) >= 0.1
+    assert profile.end("a") > profile.end("b")